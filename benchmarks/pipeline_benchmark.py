@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark for the drawing pipeline.
+
+Runs convert_to_line_image -> convert_image_to_vectors -> order_strokes ->
+merge_strokes -> follow_vectors (against the simulated arm) over synthetic and fixture images at
+several resolutions, and writes per-stage timings, peak memory, plan size,
+pen-up/pen-down distance and simulated robot time as JSON.
+
+    python benchmarks/pipeline_benchmark.py --resolutions 512x768,1024x1536
+    python benchmarks/pipeline_benchmark.py --fixtures images/ --compare benchmarks/results/baseline.json
+    python benchmarks/pipeline_benchmark.py --line-art canny,skeleton,adaptive,hatching
+
+A timing guard also orders --ordering-strokes random strokes and exits with an
+error if that takes longer than --ordering-limit seconds.
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import glob
+import io
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'src'))
+
+import numpy as np
+import cv2
+
+from config.config import Config
+from services.image_processing_service import ImageProcessingService
+from services.path_planning_service import PathPlanningService
+from services.movement_service import MovementService
+from services.robot_service import RobotService
+import utils.path_utils as path_utils
+import utils.line_art_utils as line_art_utils
+import utils.profiling_utils as profiling_utils
+
+
+def _synthetic_shapes(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Filled and outlined geometric shapes."""
+    image = np.full((height, width, 3), 255, np.uint8)
+    scale = min(width, height)
+    for _ in range(40):
+        colour = tuple(int(c) for c in rng.integers(0, 200, 3))
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        kind = rng.integers(0, 3)
+        if kind == 0:
+            cv2.circle(image, (x, y), int(rng.integers(scale // 50, scale // 6)), colour, int(rng.integers(1, 6)))
+        elif kind == 1:
+            cv2.line(image, (x, y), (int(rng.integers(0, width)), int(rng.integers(0, height))), colour, int(rng.integers(1, 8)))
+        else:
+            cv2.rectangle(image, (x, y), (int(rng.integers(0, width)), int(rng.integers(0, height))), colour, -1)
+    return image
+
+
+def _synthetic_sketch(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Thin wandering pen strokes, similar to generated line art."""
+    image = np.full((height, width, 3), 255, np.uint8)
+    step = max(2, min(width, height) // 60)
+    for _ in range(60):
+        points = [rng.integers(0, (width, height))]
+        heading = rng.uniform(0, 2 * np.pi)
+        for _ in range(int(rng.integers(20, 120))):
+            heading += rng.normal(0, 0.3)
+            points.append(points[-1] + step * np.array([np.cos(heading), np.sin(heading)]))
+        pts = np.array(points, dtype=np.int32).reshape(-1, 1, 2)
+        cv2.polylines(image, [pts], False, (0, 0, 0), int(rng.integers(1, 4)), cv2.LINE_AA)
+    return image
+
+
+def _synthetic_texture(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Blurred noise texture, a worst case with many short edges."""
+    small = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16)), dtype=np.uint8)
+    texture = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    return cv2.cvtColor(texture, cv2.COLOR_GRAY2BGR)
+
+
+SYNTHETIC_IMAGES: Dict[str, Callable[[int, int, np.random.Generator], np.ndarray]] = {
+    "shapes": _synthetic_shapes,
+    "sketch": _synthetic_sketch,
+    "texture": _synthetic_texture,
+}
+
+
+def build_corpus(resolutions: List[Tuple[int, int]], fixtures: List[str], seed: int) -> List[Tuple[str, np.ndarray]]:
+    """
+    Build (name, image) cases for every synthetic generator and fixture at every resolution.
+    """
+    cases = []
+    for width, height in resolutions:
+        for name, generate in SYNTHETIC_IMAGES.items():
+            rng = np.random.default_rng(seed)
+            cases.append((f"{name}@{width}x{height}", generate(width, height, rng)))
+        for path in fixtures:
+            image = cv2.imread(path)
+            if image is None:
+                print(f"Skipping unreadable fixture: {path}")
+                continue
+            resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            cases.append((f"{Path(path).stem}@{width}x{height}", resized))
+    return cases
+
+
+class PipelineBenchmark:
+    """
+    Runs the drawing pipeline stages against the simulated arm and records metrics.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.image_processing_service = ImageProcessingService(config)
+        self.path_planning_service = PathPlanningService(config, self.image_processing_service)
+        self.robot_service = RobotService(config)
+        self.movement_service = MovementService(config, self.robot_service)
+        self._trace_memory = False
+
+    def _stage(self, stages: Dict, name: str, func: Callable, *args):
+        """Run one stage, recording wall time (or peak traced memory when tracing)."""
+        if self._trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        stages[name] = {"wall_s": elapsed}
+        if self._trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stages[name]["peak_mem_bytes"] = peak
+        return result
+
+    def run_case(self, image: np.ndarray, trace_memory: bool = False, line_art: str = None) -> Dict:
+        """
+        Run every pipeline stage once on an image with a line-art algorithm.
+        Memory tracing slows the stages down, so timings from traced runs
+        should not be used.
+        """
+        stages = {}
+        self._trace_memory = trace_memory
+        # Start every run from the same pose so simulated times are comparable
+        self.robot_service.move_centred_position()
+        self.robot_service.arm.reset_stats()
+
+        line_image = self._stage(stages, "line_image", self.image_processing_service.convert_to_line_image,
+                                 image, line_art)
+        vectors = self._stage(stages, "vectors", self.path_planning_service.convert_image_to_vectors, line_image)
+        vectors = self._stage(stages, "order", self.path_planning_service.order_strokes, vectors, line_image)
+        vectors = self._stage(stages, "merge", self.path_planning_service.merge_strokes, vectors, line_image)
+        self._stage(stages, "motion", self.movement_service.follow_vectors, vectors, line_image)
+
+        scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+        return {
+            "stages": stages,
+            "total_wall_s": sum(stage["wall_s"] for stage in stages.values()),
+            "line_image_shape": list(line_image.shape),
+            "segments": len(vectors),
+            "points": vectors.num_points,
+            "pen_down_mm": float(path_utils.stroke_lengths(vectors).sum() * scaling_factor),
+            "pen_up_mm": path_utils.pen_up_distance(vectors) * scaling_factor,
+            "robot_commands": self.robot_service.arm.command_count,
+            "simulated_robot_s": self.robot_service.arm.simulated_time,
+        }
+
+    def run(self, cases: List[Tuple[str, np.ndarray]], repeat: int, quiet: bool = True,
+            line_arts: List[str] = None) -> Dict[str, Dict]:
+        """
+        Run every case with every line-art algorithm `repeat` times, keeping the
+        median timings of the repeats, plus one traced run for peak memory.
+        Results for algorithms other than the configured default are named
+        "<case>+<algorithm>".
+        """
+        default = self.config.image_processing.line_art
+        runs_to_do = [(name if line_art == default else f"{name}+{line_art}", image, line_art)
+                      for name, image in cases for line_art in (line_arts or [default])]
+        results = {}
+        for name, image, line_art in runs_to_do:
+            runs = []
+            output = io.StringIO() if quiet else sys.stdout
+            with contextlib.redirect_stdout(output):
+                for _ in range(repeat):
+                    runs.append(self.run_case(image, line_art=line_art))
+                traced = self.run_case(image, trace_memory=True, line_art=line_art)
+
+            result = runs[-1]
+            for stage in result["stages"]:
+                result["stages"][stage]["wall_s"] = statistics.median(run["stages"][stage]["wall_s"] for run in runs)
+                result["stages"][stage]["peak_mem_bytes"] = traced["stages"][stage]["peak_mem_bytes"]
+            result["total_wall_s"] = statistics.median(run["total_wall_s"] for run in runs)
+            result["peak_mem_bytes"] = max(stage["peak_mem_bytes"] for stage in traced["stages"].values())
+            results[name] = result
+
+            print(f"{name:<36} {result['total_wall_s'] * 1000:8.1f} ms  "
+                  f"{result['segments']:6d} segs  {result['points']:7d} pts  "
+                  f"pen-up {result['pen_up_mm']:8.0f} mm  robot {result['simulated_robot_s']:7.1f} s")
+        return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Compare results with a baseline run, returning descriptions of regressions.
+    """
+    regressions = []
+    metrics = ["total_wall_s", "peak_mem_bytes", "simulated_robot_s", "pen_up_mm", "points"]
+    print("\nComparison with baseline:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        deltas = []
+        for metric in metrics:
+            old, new = baseline[name].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            deltas.append(f"{metric} {change:+.1%}")
+            if change > threshold:
+                regressions.append(f"{name}: {metric} {old:.4g} -> {new:.4g} ({change:+.1%})")
+        print(f"  {name:<36} " + ", ".join(deltas))
+    return regressions
+
+
+def time_stroke_ordering(config: Config, strokes: int, seed: int) -> float:
+    """
+    Seconds to order `strokes` random short strokes with the greedy tour and
+    2-opt, the part of planning that grows fastest with plan size.
+    """
+    rng = np.random.default_rng(seed)
+    starts = rng.random((strokes, 2)) * 1000.0
+    ends = starts + rng.normal(0.0, 5.0, (strokes, 2))
+    settings = config.path_planning
+    start = time.perf_counter()
+    order, flipped = path_utils.order_strokes_greedy(starts, ends, origin=(0.0, 0.0))
+    flipped = flipped[:, None]
+    starts, ends = np.where(flipped, ends[order], starts[order]), np.where(flipped, starts[order], ends[order])
+    path_utils.two_opt_strokes(starts, ends, max_passes=settings.two_opt_passes, window=settings.two_opt_window,
+                               origin=(0.0, 0.0), neighbours=settings.two_opt_neighbours)
+    return time.perf_counter() - start
+
+
+def _parse_resolutions(value: str) -> List[Tuple[int, int]]:
+    resolutions = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the drawing pipeline against the simulated arm")
+    parser.add_argument("--resolutions", type=_parse_resolutions, default=_parse_resolutions("512x768,1024x1536"),
+                        help="Comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--fixtures", nargs="*", default=[],
+                        help="Fixture image files or directories to include")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (median is kept)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic images")
+    parser.add_argument("--output", help="Results JSON path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative increase reported as a regression")
+    parser.add_argument("--line-art", default=None,
+                        help="Comma separated line-art algorithms to sweep "
+                             f"({', '.join(line_art_utils.line_art_names())}; default: configured one)")
+    parser.add_argument("--ordering-strokes", type=int, default=20000,
+                        help="Random strokes for the stroke ordering timing guard")
+    parser.add_argument("--ordering-limit", type=float, default=8.0,
+                        help="Seconds the stroke ordering guard may take before failing (0 disables it)")
+    parser.add_argument("--verbose", action="store_true", help="Show service output while running")
+    args = parser.parse_args()
+    line_arts = args.line_art.split(",") if args.line_art else None
+    for line_art in line_arts or []:
+        line_art_utils.get_line_art(line_art)
+
+    fixtures = []
+    for item in args.fixtures:
+        if os.path.isdir(item):
+            for pattern in ("*.png", "*.jpg", "*.jpeg"):
+                fixtures.extend(sorted(glob.glob(os.path.join(item, pattern))))
+        else:
+            fixtures.append(item)
+
+    config = Config()
+    config.robot.backend = "sim"
+    # Recorded spans would pile up over every case and skew the memory figures
+    config.profiling.enabled = False
+    profiling_utils.configure(config.profiling)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmark = PipelineBenchmark(config)
+
+    cases = build_corpus(args.resolutions, fixtures, args.seed)
+    results = benchmark.run(cases, args.repeat, quiet=not args.verbose, line_arts=line_arts)
+
+    ordering_s = None
+    if args.ordering_limit > 0:
+        ordering_s = time_stroke_ordering(config, args.ordering_strokes, args.seed)
+        print(f"{'ordering@' + str(args.ordering_strokes) + ' strokes':<36} {ordering_s * 1000:8.1f} ms  "
+              f"(limit {args.ordering_limit:.1f} s)")
+
+    output = Path(args.output) if args.output else Path(ROOT) / "benchmarks" / "results" / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "results": results,
+        "ordering_guard": {"strokes": args.ordering_strokes, "wall_s": ordering_s, "limit_s": args.ordering_limit},
+    }
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if ordering_s is not None and ordering_s > args.ordering_limit:
+        print(f"\n⚠️  Ordering {args.ordering_strokes} strokes took {ordering_s:.1f} s, "
+              f"over the {args.ordering_limit:.1f} s limit")
+        sys.exit(1)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n⚠️  Regressions:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
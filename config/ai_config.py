@@ -5,4 +5,9 @@ class ImageGenConfig:
     model: str = "gpt-image-1"
     model_edit: str = "gpt-4o"
     quality: str = "medium"
-    size: str = "1024x1536"
\ No newline at end of file
+    size: str = "1024x1536"
+    
+    # On-disk cache of generated images keyed by prompt and model settings
+    cache_enabled: bool = True
+    cache_dir: str = "images/cache/generated"
+    cache_max_mb: float = 500.0
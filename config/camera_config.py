@@ -6,4 +6,8 @@ class CameraConfig:
     camera_index: int = 0
     warmup: float = 1.0
     save: bool = True
-    out_dir: str = "images/captured"
\ No newline at end of file
+    out_dir: str = "images/captured"
+    # Keep the device open and grab frames in the background between captures
+    persistent: bool = True
+    buffer_size: int = 4
+    frame_timeout: float = 2.0
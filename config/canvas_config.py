@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -13,6 +13,11 @@ class CanvasConfig:
     width: float = max_x-min_x
     height: float = max_y-min_y
     
+    # Optional 2x3 affine ((a, b, tx), (c, d, ty)) from canvas millimetres (origin at the
+    # image's top-left corner) to robot coordinates, e.g. from a calibration that
+    # corrects rotation or uneven scale. None places canvas millimetres at (min_x, min_y).
+    calibration_affine: Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float]]] = None
+    
     @property
     def dimensions(self) -> Tuple[float, float]:
         """Get canvas dimensions - (width,height)."""
@@ -23,7 +28,14 @@ class CanvasConfig:
         """Get canvas center coordinates - (x,y)."""
         return ((self.min_x + self.max_x) / 2, (self.min_y + self.max_y) / 2)
     
-    def is_within_bounds(self, x: float, y: float) -> bool:
-        """Check if coordinates are within canvas bounds."""
-        return (self.min_x <= x <= self.max_x and 
-                self.min_y <= y <= self.max_y)
+    @property
+    def canvas_to_robot_affine(self) -> Tuple[Tuple[float, float, float], Tuple[float, float, float]]:
+        """Get the 2x3 affine from canvas millimetres to robot coordinates."""
+        if self.calibration_affine is not None:
+            return self.calibration_affine
+        return ((1.0, 0.0, self.min_x), (0.0, 1.0, self.min_y))
+    
+    def is_within_bounds(self, x, y):
+        """Check if coordinates are within canvas bounds. Accepts scalars or NumPy arrays."""
+        return ((self.min_x <= x) & (x <= self.max_x) &
+                (self.min_y <= y) & (y <= self.max_y))
@@ -2,10 +2,22 @@ from .robot_config import RobotConfig
 from .canvas_config import CanvasConfig
 from .ai_config import ImageGenConfig
 from .camera_config import CameraConfig
+from .image_processing_config import ImageProcessingConfig
+from .path_planning_config import PathPlanningConfig
+from .profiling_config import ProfilingConfig
+from .vision_config import VisionConfig
+from .movement_config import MovementConfig
+from .pipeline_config import PipelineConfig
 
 class Config:
     def __init__(self):
         self.robot = RobotConfig()
         self.canvas = CanvasConfig()
         self.ai = ImageGenConfig()
-        self.camera = CameraConfig()
\ No newline at end of file
+        self.camera = CameraConfig()
+        self.image_processing = ImageProcessingConfig()
+        self.path_planning = PathPlanningConfig()
+        self.profiling = ProfilingConfig()
+        self.vision = VisionConfig()
+        self.movement = MovementConfig()
+        self.pipeline = PipelineConfig()
\ No newline at end of file
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+@dataclass
+class ImageProcessingConfig:
+    """Line extraction configuration."""
+    # Line-art algorithm from utils.line_art_utils: "canny", "skeleton", "adaptive" or "hatching"
+    line_art: str = "canny"
+    
+    blur_kernel: int = 5
+    blur_sigma: float = 1.0
+    canny_low: int = 50
+    canny_high: int = 100
+    # Adaptive threshold neighbourhood (pixels, odd) and offset below the local mean
+    adaptive_block_size: int = 31
+    adaptive_offset: int = 10
+    # Hatching: one hatch direction is added below each tone (0-255, light to dark),
+    # lines are hatch_spacing_mm apart, and centreline outlines are drawn on top
+    hatch_tones: Tuple[int, ...] = (200, 150, 100)
+    hatch_spacing_mm: float = 3.0
+    hatch_outlines: bool = True
+    
+    # Line image resolution; images are scaled to the canvas at this many pixels per mm
+    pixels_per_mm: float = 1.0
+    
+    # Line images of at least tile_min_pixels are split into tiles for edge detection and
+    # contour tracing on tile_workers processes (None uses every core). Line-art tiles overlap
+    # by at least tile_overlap pixels, more when the algorithm's filters reach further
+    tiled_extraction: bool = True
+    tile_min_pixels: int = 4_000_000
+    tile_size: int = 1024
+    tile_overlap: int = 16
+    tile_workers: Optional[int] = None
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from core.models import SpeedType
+
+@dataclass
+class MovementConfig:
+    """Stroke simplification, speed profiling and pre-flight checks for drawing moves."""
+    # Simplification tolerance (mm) as a fraction of the attachment's line width
+    simplify_tolerance_ratio: float = 0.25
+    # Blend each vertex with the largest arc that stays within the tolerance,
+    # instead of the fixed RobotConfig.blend_radius
+    fit_arcs: bool = True
+    max_blend_radius_mm: float = 10.0
+    
+    # Pick a speed per move from its corners and length, between the two speed
+    # types below, do pen-up travel at `travel_speed`, and lower and lift the
+    # pen vertically at `pen_speed`; otherwise everything runs at SpeedType.NORMAL
+    profile_speeds: bool = True
+    min_draw_speed: SpeedType = SpeedType.SLOW
+    max_draw_speed: SpeedType = SpeedType.FAST
+    travel_speed: SpeedType = SpeedType.FAST
+    pen_speed: SpeedType = SpeedType.SLOW
+    
+    preflight: bool = True
+    # Plans estimated to take longer than this (seconds) trigger the policy; None disables the check
+    time_budget_s: Optional[float] = 1800.0
+    # "warn" prints a warning and carries on, "refuse" raises before the arm moves
+    over_budget_policy: str = "warn"
@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+
+@dataclass
+class PathPlanningConfig:
+    """Path planning configuration for contour extraction, stroke ordering, plan caching and erasing."""
+    # "labelled" (connected-component labelling + skeleton traversal) or "dfs" (legacy per-pixel search)
+    contour_backend: str = "labelled"
+    
+    # Stroke ordering to minimise pen-up travel
+    optimise_stroke_order: bool = True
+    two_opt_passes: int = 3
+    two_opt_window: int = 1000
+    # 2-opt only tries moves that join a stroke end to one of its this many nearest endpoints
+    two_opt_neighbours: int = 16
+    # Keep the pen down between consecutive strokes whose ends are this close (canvas mm)
+    merge_strokes: bool = True
+    merge_tolerance_mm: float = 1.0
+    # Streaming (iter_strokes): rows traced at a time, rows traced below the pen before
+    # choosing its next stroke, and strokes per yielded chunk
+    stream_strip_rows: int = 32
+    stream_lookahead_rows: int = 96
+    stream_chunk_strokes: int = 32
+    
+    # On-disk cache of stroke plans keyed by image and processing settings
+    plan_cache_enabled: bool = True
+    plan_cache_dir: str = "images/cache/plans"
+    plan_cache_max_mb: float = 200.0
+    
+    # "coverage" (eraser-sized cells over the ink) or "sweep" (full-canvas lanes, skipping clean ones)
+    erase_strategy: str = "coverage"
+    # Eraser footprint in captured-image pixels
+    eraser_width_px: int = 80
+    eraser_height_px: int = 40
+    # Lane spacing for the sweep strategy, in canvas millimetres
+    eraser_lane_width_mm: float = 20.0
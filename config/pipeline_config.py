@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+@dataclass
+class PipelineConfig:
+    """Overlapping of image generation, planning and arm motion in DrawingTools."""
+    enabled: bool = True
+    # Move the arm into position (tool change, centring) while an image request is in flight
+    prepare_arm_during_generation: bool = True
+    # Planned chunks allowed to wait for the arm before planning pauses
+    queue_size: int = 2
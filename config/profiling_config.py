@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+@dataclass
+class ProfilingConfig:
+    """Instrumentation configuration for timing pipeline stages."""
+    enabled: bool = True
+    show_summary: bool = True
+    # Span names (e.g. "PathPlanningService.convert_image_to_vectors") to run under cProfile;
+    # "*" profiles every top-level command.
+    cprofile_stages: Tuple[str, ...] = ()
+    cprofile_dir: str = "profiles"
@@ -7,6 +7,13 @@ from core.models import AttachmentType, SpeedType, RobotState
 @dataclass
 class RobotConfig:
     ip: str = "192.168.1.239"
+    # "xarm" connects to the arm at `ip`, "sim" uses the offline SimulatedXArm
+    backend: str = "xarm"
+    sim_command_latency: float = 0.002
+    # Lay simulated moves out on the wall clock (sped up by sim_realtime_speedup) so the
+    # controller queue drains as it would on the arm
+    sim_realtime: bool = False
+    sim_realtime_speedup: float = 1.0
     speed: float = 100.0
     
     current_attachment: AttachmentType = AttachmentType.MARKER
@@ -19,6 +26,12 @@ class RobotConfig:
     
     mvacc: float = 100.0
     max_step: float = 0.05
+    # Radius (mm) used to blend consecutive moves within a stroke
+    blend_radius: float = 2.0
+    # Commands allowed in the controller's queue before sending blocks, and how often
+    # the queue is polled while waiting on it or on motion futures
+    max_queued_commands: int = 256
+    motion_poll_interval: float = 0.02
     
     centred_position: Dict[str, float] = None
     change_tool_position: Dict[str, float] = None
@@ -26,6 +39,8 @@ class RobotConfig:
     
     speeds: Dict[str, float] = None
     attachment_z_heights: Dict[str, Dict[str, float]] = None
+    # Width (mm) of the line each attachment leaves on the canvas
+    attachment_widths: Dict[str, float] = None
 
     def __post_init__(self):
         if self.speeds is None:
@@ -42,6 +57,13 @@ class RobotConfig:
                 AttachmentType.PEN: {"lowered": 120.0, "raised": 127.0},
                 AttachmentType.EMPTY: {"lowered": 158.0, "raised": 170.0},
             }
+        if self.attachment_widths is None:
+            self.attachment_widths = {
+                AttachmentType.MARKER: 2.0,
+                AttachmentType.ERASER: 20.0,
+                AttachmentType.PEN: 0.8,
+                AttachmentType.EMPTY: 1.0,
+            }
         if self.centred_position is None:
             self.centred_position = {
                 "x": 200,
@@ -84,3 +106,7 @@ class RobotConfig:
     def z_raised(self) -> float:
         """Get Z height for raised position with current attachment."""
         return self.attachment_z_heights[self.current_attachment]["raised"]
+    
+    def get_attachment_width(self, attachment: AttachmentType = None) -> float:
+        """Get the line width (mm) of an attachment, defaulting to the current one."""
+        return self.attachment_widths[attachment or self.current_attachment]
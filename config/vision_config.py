@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+@dataclass
+class VisionConfig:
+    """AprilTag detection and canvas cropping configuration."""
+    tag_family: str = "tag25h9"
+    detector_threads: int = 4
+    quad_decimate: float = 1.0
+    quad_sigma: float = 0.0
+    refine_edges: int = 1
+    decode_sharpening: float = 0.25
+    
+    # Track tags in regions of interest around their previous location, then search
+    # a decimated image, and only fall back to a full-resolution search if both fail
+    track_tags: bool = True
+    roi_margin_px: int = 40
+    coarse_decimate: float = 3.0
+    
+    # Pixels to shrink the cropped canvas by, away from the tags
+    shrink_px: int = 10
+    # Reuse the cached perspective transform while tag corners move less than this (pixels)
+    homography_tolerance_px: float = 3.0
+    # Crop with the cached transform when some tags are occluded but the visible ones haven't moved
+    reuse_on_partial_detection: bool = True
@@ -1,4 +1,9 @@
+from dataclasses import dataclass
 from enum import Enum
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
 
 
 class AttachmentType(Enum):
@@ -23,4 +28,110 @@ class RobotState(Enum):
     TOOL_CHANGE = "tool_change"
     UNKNOWN = "unknown"
     CALCULATING = "calculating"
-    
\ No newline at end of file
+    
+
+@dataclass
+class StrokePlan:
+    """
+    Strokes stored as one flat (N, 2) point array plus stroke offsets (CSR layout).
+    
+    Stroke i is points[offsets[i]:offsets[i + 1]]; indexing and iterating
+    return views into `points`, so no per-stroke copies are made.
+    """
+    points: NDArray
+    offsets: NDArray[np.int64]
+    
+    @classmethod
+    def empty(cls, dtype=np.int32) -> "StrokePlan":
+        """Plan without strokes."""
+        return cls(np.zeros((0, 2), dtype=dtype), np.zeros(1, dtype=np.int64))
+    
+    @classmethod
+    def from_segments(cls, segments: Iterable, dtype=np.int32) -> "StrokePlan":
+        """Build a plan from a sequence of point sequences (lists of (x, y) or arrays)."""
+        segments = list(segments)
+        if not segments:
+            return cls.empty(dtype)
+        arrays = [np.asarray(seg, dtype=dtype).reshape(-1, 2) for seg in segments]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+        return cls(np.concatenate(arrays), offsets)
+    
+    @classmethod
+    def concatenate(cls, plans: Iterable["StrokePlan"]) -> "StrokePlan":
+        """Join plans one after another."""
+        plans = list(plans)
+        if not plans:
+            return cls.empty()
+        offsets = [plans[0].offsets]
+        base = plans[0].offsets[-1]
+        for plan in plans[1:]:
+            offsets.append(plan.offsets[1:] + base)
+            base += plan.offsets[-1]
+        return cls(np.concatenate([plan.points for plan in plans]), np.concatenate(offsets))
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index: int) -> NDArray:
+        if index < 0:
+            index += len(self)
+        return self.points[self.offsets[index]:self.offsets[index + 1]]
+    
+    def __iter__(self) -> Iterator[NDArray]:
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield self.points[start:end]
+    
+    @property
+    def num_points(self) -> int:
+        return int(self.offsets[-1])
+    
+    @property
+    def lengths(self) -> NDArray[np.int64]:
+        """Number of points in each stroke."""
+        return np.diff(self.offsets)
+    
+    @property
+    def starts(self) -> NDArray:
+        """First point of each stroke."""
+        return self.points[self.offsets[:-1]]
+    
+    @property
+    def ends(self) -> NDArray:
+        """Last point of each stroke."""
+        return self.points[self.offsets[1:] - 1]
+    
+    def reordered(self, order: NDArray, flipped: Optional[NDArray] = None) -> "StrokePlan":
+        """
+        New plan with strokes taken in `order`, reversing those marked in `flipped`.
+        """
+        order = np.asarray(order, dtype=np.int64)
+        lengths = self.lengths[order]
+        offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        
+        # Position of every output point within its stroke
+        position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        if flipped is not None:
+            flip = np.repeat(np.asarray(flipped, dtype=bool), lengths)
+            position = np.where(flip, np.repeat(lengths, lengths) - 1 - position, position)
+        source = np.repeat(self.offsets[:-1][order], lengths) + position
+        return StrokePlan(self.points[source], offsets)
+    
+    def select(self, mask: NDArray) -> "StrokePlan":
+        """New plan keeping only the strokes where `mask` is true."""
+        return self.reordered(np.flatnonzero(mask))
+    
+    def joined(self, join_next: NDArray) -> "StrokePlan":
+        """
+        New plan where each stroke marked in `join_next` continues straight into
+        the following one, given one flag per gap between strokes.
+        """
+        keep = np.ones(len(self.offsets), dtype=bool)
+        keep[1:-1] = ~np.asarray(join_next, dtype=bool)
+        return StrokePlan(self.points, self.offsets[keep])
+    
+    def to_segments(self) -> List[List[Tuple]]:
+        """Convert to a list of (x, y) tuple lists."""
+        points = [tuple(pt) for pt in self.points.tolist()]
+        return [points[start:end] for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
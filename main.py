@@ -25,6 +25,8 @@ from services.movement_service import MovementService
 from services.robot_service import RobotService
 from services.camera_service import CameraService
 from tools.drawing_tool import DrawingTools
+import utils.profiling_utils as profiling_utils
+import utils.line_art_utils as line_art_utils
 
 from core.models import  SpeedType
 
@@ -87,6 +89,9 @@ class CreativeRoboticAssistant:
         
         # Initialize configuration
         self.config = Config()
+        # Line-art algorithm for drawing requests, None uses ImageProcessingConfig.line_art
+        self.line_art: Optional[str] = None
+        profiling_utils.configure(self.config.profiling)
         
         # Initialize services in dependency order
         # 1. Basic services that only need config
@@ -117,6 +122,15 @@ class CreativeRoboticAssistant:
             print("\n⚠️  Robot Error Summary:")
             print(error_summary)
     
+    def shutdown(self):
+        """Release hardware resources held between commands."""
+        self.camera_service.close()
+    
+    def _print_timing_summary(self):
+        """Print the per-stage timings recorded for the last command."""
+        if self.config.profiling.enabled and self.config.profiling.show_summary:
+            print(profiling_utils.summary())
+    
     def generate_and_draw(self, prompt: str):
         """
         Generate an image from a prompt and draw it on the canvas.
@@ -125,14 +139,17 @@ class CreativeRoboticAssistant:
             prompt (str): Text description of the image to generate and draw
         """
         print(f"Generating and drawing: {prompt}")
+        profiling_utils.reset()
         try:
-            self.drawing_tools.generate_and_draw(prompt)
+            self.drawing_tools.generate_and_draw(prompt, line_art=self.line_art)
             print("✅ Image generated and drawn successfully!")
         except Exception as e:
             print(f"❌ Error during generate and draw: {e}")
             print("Full traceback:")
             traceback.print_exc()
             raise
+        finally:
+            self._print_timing_summary()
     
     def edit_and_draw(self, prompt: str):
         """
@@ -142,14 +159,17 @@ class CreativeRoboticAssistant:
             prompt (str): Text description of how to edit the current drawing
         """
         print(f"Editing and drawing: {prompt}")
+        profiling_utils.reset()
         try:
-            self.drawing_tools.edit_and_draw(prompt)
+            self.drawing_tools.edit_and_draw(prompt, line_art=self.line_art)
             print("✅ Image edited and drawn successfully!")
         except Exception as e:
             print(f"❌ Error during edit and draw: {e}")
             print("Full traceback:")
             traceback.print_exc()
             raise
+        finally:
+            self._print_timing_summary()
     
     def draw_image(self, image_path: str):
         """
@@ -159,19 +179,34 @@ class CreativeRoboticAssistant:
             image_path (str): Path to the image file to draw
         """
         print(f"Drawing image from: {image_path}")
+        profiling_utils.reset()
         try:
             import cv2
             image = cv2.imread(image_path)
             if image is None:
                 raise ValueError(f"Could not load image from {image_path}")
             
-            self.drawing_tools.draw_image(image)
+            self.drawing_tools.draw_image(image, line_art=self.line_art)
             print("✅ Image drawn successfully!")
         except Exception as e:
             print(f"❌ Error during image drawing: {e}")
             print("Full traceback:")
             traceback.print_exc()
             raise
+        finally:
+            self._print_timing_summary()
+    
+    def set_line_art(self, name: Optional[str]):
+        """
+        Choose the line-art algorithm used by later drawing requests.
+        
+        Args:
+            name (str, optional): Registered algorithm name, or None for the configured default
+        """
+        if name is not None:
+            line_art_utils.get_line_art(name)
+        self.line_art = name
+        print(f"🖌️ Line art: {name or self.config.image_processing.line_art}")
     
     def erase_canvas(self):
         """Erase the entire canvas."""
@@ -221,8 +256,10 @@ def main():
                        help="Action to perform")
     parser.add_argument("--prompt", "-p", 
                        help="Text prompt for generation or editing")
-    parser.add_argument("--path", "-p", 
+    parser.add_argument("--path", 
                        help="Path to image file for input or output")
+    parser.add_argument("--line-art", "-l", choices=line_art_utils.line_art_names(),
+                       help="Line-art algorithm for generate, edit and draw")
     
     args = parser.parse_args()
     
@@ -230,6 +267,9 @@ def main():
     assistant = CreativeRoboticAssistant()
     
     try:
+        if args.line_art:
+            assistant.set_line_art(args.line_art)
+            
         if args.action == "generate":
             if not args.prompt:
                 print("❌ Error: --prompt is required for generate action")
@@ -260,6 +300,8 @@ def main():
     except Exception as e:
         print(f"❌ Fatal error: {e}")
         sys.exit(1)
+    finally:
+        assistant.shutdown()
 
 
 if __name__ == "__main__":
@@ -275,7 +317,8 @@ if __name__ == "__main__":
         print("  4) 🧽 erase               • Clear the canvas")
         print("  5) 📸 capture [save_path] • Snapshot the canvas")
         print("  6) 🚦 errors              • Show robot status")
-        print("  7) 🚪 quit                • Exit")
+        print("  7) 🖌️ lineart [name]       • Show or choose the line-art algorithm")
+        print("  8) 🚪 quit                • Exit")
         print("═" * 60)
         
         assistant = CreativeRoboticAssistant()
@@ -324,6 +367,15 @@ if __name__ == "__main__":
                     error_summary = assistant.robot_service.get_error_summary()
                     print(error_summary)
                     
+                elif action == "lineart":
+                    if len(command) < 2:
+                        current = assistant.line_art or assistant.config.image_processing.line_art
+                        for algorithm in line_art_utils.LINE_ART_ALGORITHMS.values():
+                            marker = "*" if algorithm.name == current else " "
+                            print(f" {marker} {algorithm.name:<10} {algorithm.description}")
+                        continue
+                    assistant.set_line_art(command[1].lower())
+                    
                 else:
                     print(f"❌ Unknown command: {action}")
                     
@@ -334,6 +386,8 @@ if __name__ == "__main__":
                 print(f"❌ Error: {e}")
                 print("Full traceback:")
                 traceback.print_exc()
+        
+        assistant.shutdown()
     else:
         # Run with command line arguments
         main()
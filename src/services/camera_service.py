@@ -1,5 +1,8 @@
+import atexit
 import cv2
+import threading
 import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 import platform
@@ -7,16 +10,29 @@ import numpy as np
 from numpy.typing import NDArray
 
 from config.config import Config
+from utils.profiling_utils import timed
 
 class CameraService:
     """
     Service for managing camera operations.
+    
+    In persistent mode the device stays open and a background thread keeps
+    grabbing frames into a small ring buffer, so captures skip the warmup.
     """
     def __init__(self, config: Config):
         self.config = config
         self.camera = None
         
-    def capture_photo(self, save:bool = False) -> NDArray[np.uint8]:
+        self._frames = deque(maxlen=max(1, self.config.camera.buffer_size))
+        self._frame_ready = threading.Condition()
+        self._grabber = None
+        self._running = False
+        atexit.register(self.close)
+        
+    def _open_capture(self):
+        """
+        Open the configured camera, returning None if it is unavailable.
+        """
         # Validate camera index and ensure it's an int
         index = self.config.camera.camera_index
         try:
@@ -49,11 +65,91 @@ class CameraService:
         start = time.time()
         while time.time() - start < self.config.camera.warmup:
             cap.read()
-
+            
+        return cap
+        
+    def start(self) -> bool:
+        """
+        Open the camera and start grabbing frames in the background.
+        """
+        if self._running:
+            return True
+        
+        cap = self._open_capture()
+        if cap is None:
+            return False
+        
+        self.camera = cap
+        self._frames.clear()
+        self._running = True
+        self._grabber = threading.Thread(target=self._grab_frames, name="CameraGrabber", daemon=True)
+        self._grabber.start()
+        return True
+        
+    def _grab_frames(self):
+        """
+        Continuously read frames into the ring buffer until closed.
+        """
+        while self._running:
+            ret, frame = self.camera.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._frame_ready:
+                self._frames.append((time.monotonic(), frame))
+                self._frame_ready.notify_all()
+                
+    def close(self):
+        """
+        Stop the background grabber and release the camera.
+        """
+        self._running = False
+        if self._grabber is not None:
+            self._grabber.join(timeout=1.0)
+            self._grabber = None
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+        self._frames.clear()
+        
+    def _latest_frame(self, newer_than: float):
+        """
+        Return the newest buffered frame grabbed after `newer_than`, waiting briefly for one.
+        """
+        with self._frame_ready:
+            ready = self._frame_ready.wait_for(
+                lambda: self._frames and self._frames[-1][0] > newer_than,
+                timeout=self.config.camera.frame_timeout,
+            )
+            if not ready:
+                return None
+            return self._frames[-1][1].copy()
+        
+    def _capture_once(self):
+        """
+        Open the camera, grab a single frame and release it.
+        """
+        cap = self._open_capture()
+        if cap is None:
+            return None
+        
         ret, frame = cap.read()
         cap.release()
+        
+        return frame if ret else None
+        
+    @timed()
+    def capture_photo(self, save:bool = False) -> NDArray[np.uint8]:
+        if self.config.camera.persistent:
+            requested = time.monotonic()
+            if not self.start():
+                return None
+            # Only accept frames grabbed after the request so the scene is current
+            frame = self._latest_frame(newer_than=requested)
+        else:
+            frame = self._capture_once()
 
-        if not ret:
+        if frame is None:
             print("Failed to grab frame")
             return None
 
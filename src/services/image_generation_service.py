@@ -4,6 +4,7 @@ Image service for generating and editing images using OpenAI.
 
 import numpy as np
 from numpy.typing import NDArray
+import cv2
 
 from openai import OpenAI
 try:
@@ -16,18 +17,59 @@ import contextlib
 
 from config.config import Config
 from utils.image_utils import base64_to_numpy, numpy_to_openai_format
+from utils.profiling_utils import timed
+from utils.cache_utils import DiskCache
 
 class ImageGenerationService:
     """
     Service for generating and editing images using OpenAI.
     """
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, client=None):
         self.config = config
-        self.client = OpenAI()
+        self.client = client if client is not None else OpenAI()
+        self.cache = DiskCache(self.config.ai.cache_dir,
+                               int(self.config.ai.cache_max_mb * 1024 * 1024),
+                               suffix=".png")
         
-    def generate_image(self, prompt: str) -> NDArray[np.uint8]:
+    def get_cache_stats(self) -> dict:
+        """
+        Get hit/miss statistics of the generated image cache.
+        """
+        return self.cache.stats()
+        
+    @timed()
+    def generate_image(self, prompt: str, use_cache: bool = True) -> NDArray[np.uint8]:
         """
         Generate an image from a text prompt.
+        
+        Results are cached on disk by prompt and model settings unless caching
+        is disabled in the config or by `use_cache`.
+        """
+        use_cache = use_cache and self.config.ai.cache_enabled
+        key = DiskCache.make_key(prompt=prompt,
+                                 model=self.config.ai.model,
+                                 quality=self.config.ai.quality,
+                                 size=self.config.ai.size)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                image = cv2.imdecode(np.frombuffer(cached, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if image is not None:
+                    stats = self.cache.stats()
+                    print(f"🗂️  Using cached image ({stats['hits']} hits, {stats['misses']} misses)")
+                    return image
+        
+        image = self._request_image(prompt)
+        
+        if use_cache:
+            ok, encoded = cv2.imencode(".png", image)
+            if ok:
+                self.cache.put(key, encoded.tobytes())
+        return image
+        
+    def _request_image(self, prompt: str) -> NDArray[np.uint8]:
+        """
+        Request a new image for a prompt from the image generation API.
         """
         spinner_ctx = (
             yaspin(text="Generating image", color="cyan", spinner=Spinners.pong)
@@ -47,6 +89,7 @@ class ImageGenerationService:
             return base64_to_numpy(image_base64)
         
 
+    @timed()
     def edit_image(self, original_image: NDArray[np.uint8], prompt: str) -> NDArray[np.uint8]: 
         """
         Generate an image from a text prompt.
@@ -71,6 +114,7 @@ class ImageGenerationService:
                 sp.ok("✅")
             return base64_to_numpy(image_base64) 
     
+    @timed()
     def describe_image(self, image: NDArray[np.uint8]) -> str:
         """
         Get a description of an image.
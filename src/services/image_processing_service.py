@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 from numpy.typing import NDArray
 
@@ -6,72 +8,241 @@ from pupil_apriltags import Detector
 
 
 from config.config import Config
+from config.image_processing_config import ImageProcessingConfig
 import utils.image_utils as image_utils
+import utils.line_art_utils as line_art_utils
+import utils.tile_utils as tile_utils
+from utils.profiling_utils import timed
+
+
+def _tile_to_line_image(tile: NDArray[np.uint8], core: tuple, line_art: str,
+                        settings: ImageProcessingConfig) -> NDArray[np.uint8]:
+    """
+    Process pool worker: convert one tile to line art, keeping only its
+    (top, bottom, left, right) core without the overlap.
+    """
+    lines = line_art_utils.get_line_art(line_art).convert(tile, settings)
+    top, bottom, left, right = core
+    return lines[top:bottom, left:right]
+
 
 class ImageProcessingService:
     
     def __init__(self, config: Config):
         self.config = config
+        self._detectors = {}
+        self._tracked_tags = {}
+        self._homography_cache = None
         
-    def _preprocess_image(self, image: NDArray[np.uint8]) -> NDArray[np.uint8]:
+    def _scale_to_greyscale(self, image: NDArray[np.uint8]) -> NDArray[np.uint8]:
         """
-        Preprocess an image for contour extraction.
+        Scale an image to the canvas at the line image resolution and convert it to greyscale.
         """
-        scaled_image = image_utils.scale_image(image, self.config.canvas.dimensions)
-        greyscale_image = image_utils.convert_to_grayscale(scaled_image)
-        blurred_image = image_utils.apply_gaussian_blur(greyscale_image)
+        ppm = self.config.image_processing.pixels_per_mm
+        width, height = self.config.canvas.dimensions
+        scaled_image = image_utils.scale_image(image, (width * ppm, height * ppm))
+        return image_utils.convert_to_grayscale(scaled_image)
         
-        return blurred_image
+    @timed()
+    def convert_to_line_image(self, image: NDArray[np.uint8], line_art: Optional[str] = None) -> NDArray[np.uint8]:
+        """
+        Process an image to extract lines with a line-art algorithm.
         
-    def convert_to_line_image(self, image: NDArray[np.uint8]) -> NDArray[np.uint8]:
+        `line_art` names an algorithm from utils.line_art_utils and defaults to
+        ImageProcessingConfig.line_art. Large line images are converted in
+        overlapping tiles on a process pool when the algorithm allows it.
         """
-        Process an image to extract lines using Canny edge detection.
+        algorithm = line_art_utils.get_line_art(line_art or self.config.image_processing.line_art)
+        greyscale_image = self._scale_to_greyscale(image)
+        workers = tile_utils.tile_workers(self.config.image_processing, greyscale_image.shape)
+        if workers > 1 and algorithm.tileable:
+            overlap = max(self.config.image_processing.tile_overlap, algorithm.reach(self.config.image_processing))
+            return self._convert_tiles_to_line_image(greyscale_image, algorithm.name, workers, overlap)
+        
+        return algorithm.convert(greyscale_image, self.config.image_processing)
+    
+    def _convert_tiles_to_line_image(self, greyscale_image: NDArray[np.uint8], line_art: str,
+                                     workers: int, overlap: int) -> NDArray[np.uint8]:
         """
+        Convert a greyscale image to line art tile by tile on `workers` processes.
         
-        preprocessed_image = self._preprocess_image(image)
+        Each tile is processed with `overlap` extra pixels on every side, which
+        covers the algorithm's fixed-size filters, and only its core is kept.
+        Non-local steps (Canny hysteresis, thinning) can still change a few
+        pixels near the seams compared with converting the whole image.
+        """
+        settings = self.config.image_processing
+        h, w = greyscale_image.shape
+        overlap = max(0, overlap)
+        bounds = tile_utils.tile_bounds(h, w, settings.tile_size)
         
-        line_image = image_utils.apply_canny_edge_detection(preprocessed_image)
+        tasks = []
+        for top, bottom, left, right in bounds:
+            y0, y1 = max(0, top - overlap), min(h, bottom + overlap)
+            x0, x1 = max(0, left - overlap), min(w, right + overlap)
+            core = (top - y0, bottom - y0, left - x0, right - x0)
+            tasks.append((greyscale_image[y0:y1, x0:x1], core, line_art, settings))
         
+        line_image = np.empty_like(greyscale_image)
+        for (top, bottom, left, right), edges in zip(bounds, tile_utils.map_tiles(_tile_to_line_image, tasks, workers)):
+            line_image[top:bottom, left:right] = edges
         return line_image
     
+    def _get_detector(self, quad_decimate: float = None) -> Detector:
+        """
+        Get an AprilTag detector for a decimation factor, building it on first use.
+        """
+        vision = self.config.vision
+        if quad_decimate is None:
+            quad_decimate = vision.quad_decimate
+        if quad_decimate not in self._detectors:
+            self._detectors[quad_decimate] = Detector(
+                families=vision.tag_family,
+                nthreads=vision.detector_threads,
+                quad_decimate=quad_decimate,
+                quad_sigma=vision.quad_sigma,
+                refine_edges=vision.refine_edges,
+                decode_sharpening=vision.decode_sharpening,
+                debug=0
+            )
+        return self._detectors[quad_decimate]
+    
+    def _detect_in_roi(self, gray: NDArray[np.uint8], corners: NDArray, tag_id: int):
+        """
+        Detect a tag at full resolution in a region around approximate corners.
+        
+        Returns:
+            The tag's corners in full image coordinates, or None if not found
+        """
+        h, w = gray.shape
+        margin = self.config.vision.roi_margin_px
+        x0, y0 = np.maximum(np.floor(corners.min(axis=0)).astype(int) - margin, 0)
+        x1, y1 = np.minimum(np.ceil(corners.max(axis=0)).astype(int) + margin, (w, h))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        
+        roi = np.ascontiguousarray(gray[y0:y1, x0:x1])
+        for det in self._get_detector().detect(roi):
+            if det.tag_id == tag_id:
+                return det.corners + np.array([x0, y0])
+        return None
+    
+    def _detect_tags(self, gray: NDArray[np.uint8]) -> dict:
+        """
+        Detect AprilTags, cheapest strategy first:
+        1. re-detect each previously seen tag in a small region of interest,
+        2. detect on a decimated image and refine each tag in a region of interest,
+        3. fall back to a full-resolution search.
+        
+        Returns:
+            Dict of tag id to its (4, 2) corners
+        """
+        vision = self.config.vision
+        
+        if vision.track_tags and len(self._tracked_tags) == 4:
+            tracked = {}
+            for tag_id, corners in self._tracked_tags.items():
+                refined = self._detect_in_roi(gray, corners, tag_id)
+                if refined is None:
+                    break
+                tracked[tag_id] = refined
+            if len(tracked) == 4:
+                self._tracked_tags = tracked
+                return tracked
+        
+        if vision.track_tags and vision.coarse_decimate > vision.quad_decimate:
+            coarse = {}
+            for det in self._get_detector(vision.coarse_decimate).detect(gray):
+                refined = self._detect_in_roi(gray, det.corners, det.tag_id)
+                coarse[det.tag_id] = refined if refined is not None else det.corners
+            if len(coarse) == 4:
+                self._tracked_tags = coarse
+                return coarse
+        
+        detections = {det.tag_id: det.corners for det in self._get_detector().detect(gray)}
+        if len(detections) == 4:
+            self._tracked_tags = detections
+        return detections
+    
+    @timed()
     def crop_to_AprilTags(self, image: NDArray[np.uint8]) -> NDArray[np.uint8]:
         """
         Crop an image to the area defined by detected AprilTags.
+        
+        The perspective transform is cached and reused while the tags stay
+        within `VisionConfig.homography_tolerance_px` of their previous position,
+        including when some of them are occluded.
         """
         # Convert to grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         img_uint8 = cv2.convertScaleAbs(gray)
 
-        # Initialize detector
-        at_detector = Detector(
-            families="tag25h9",
-            nthreads=1,
-            quad_decimate=1.0,
-            quad_sigma=0.0,
-            refine_edges=1,
-            decode_sharpening=0.25,
-            debug=0
-        )
-
         # Detect AprilTags
-        detections = at_detector.detect(img_uint8)
-
-        if len(detections) != 4:
-            raise ValueError("Expected exactly 4 AprilTags, but found {}".format(len(detections)))
+        detections = self._detect_tags(img_uint8)
 
         # Get image center to identify inner corners
         h, w = gray.shape
         center = np.array([w / 2, h / 2])
 
         # Get the closest corner to the image center for each tag (assumed inner corner)
-        inner_corners = []
-        for det in detections:
-            corners = det.corners  # shape (4, 2)
+        inner_corners = {}
+        for tag_id, corners in detections.items():
             # Find corner closest to the center of the image
             distances = np.linalg.norm(corners - center, axis=1)
-            inner_corner = corners[np.argmin(distances)]
-            inner_corners.append(inner_corner)
+            inner_corners[tag_id] = corners[np.argmin(distances)]
+
+        M, (width, height) = self._resolve_homography(inner_corners, gray.shape)
+        warped = cv2.warpPerspective(image, M, (width, height))
 
+        return warped
+    
+    def _resolve_homography(self, inner_corners: dict, image_shape: tuple) -> tuple:
+        """
+        Get the perspective transform for the detected inner tag corners, reusing
+        the cached one when the tags have not moved.
+        
+        Returns:
+            Tuple of (matrix, (width, height))
+        """
+        cache = self._homography_cache
+        tolerance = self.config.vision.homography_tolerance_px
+        
+        def matches_cache() -> bool:
+            if cache is None or cache['image_shape'] != image_shape or not inner_corners:
+                return False
+            for tag_id, corner in inner_corners.items():
+                cached = cache['corners'].get(tag_id)
+                if cached is None or np.linalg.norm(corner - cached) > tolerance:
+                    return False
+            return True
+        
+        if len(inner_corners) == 4:
+            if matches_cache() and len(cache['corners']) == 4:
+                return cache['matrix'], cache['size']
+            
+            M, size = self._compute_homography(list(inner_corners.values()))
+            self._homography_cache = {
+                'corners': dict(inner_corners),
+                'matrix': M,
+                'size': size,
+                'image_shape': image_shape,
+            }
+            return M, size
+        
+        if self.config.vision.reuse_on_partial_detection and len(inner_corners) < 4 and matches_cache():
+            print(f"⚠️  Only {len(inner_corners)} AprilTags visible, reusing previous canvas crop")
+            return cache['matrix'], cache['size']
+        
+        raise ValueError("Expected exactly 4 AprilTags, but found {}".format(len(inner_corners)))
+    
+    def _compute_homography(self, inner_corners: list) -> tuple:
+        """
+        Compute the perspective transform from the four inner tag corners to an
+        upright canvas image.
+        
+        Returns:
+            Tuple of (matrix, (width, height))
+        """
         # Order points: top-left, top-right, bottom-right, bottom-left
         def order_points(pts):
             pts = np.array(pts)
@@ -97,8 +268,8 @@ class ImageProcessingService:
             [0, height - 1]
         ], dtype="float32")
         
-        # Shrink factor in pixels (tune as needed)
-        shrink_px = 10
+        # Shrink factor in pixels
+        shrink_px = self.config.vision.shrink_px
 
         # Compute the centroid of the four points
         centroid = np.mean(ordered_corners, axis=0)
@@ -117,8 +288,5 @@ class ImageProcessingService:
 
         # Compute perspective transform
         M = cv2.getPerspectiveTransform(shrunken_corners, dst)
-        warped = cv2.warpPerspective(image, M, (width, height))
 
-        return warped
-        
-    
\ No newline at end of file
+        return M, (width, height)
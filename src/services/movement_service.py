@@ -1,80 +1,311 @@
 from numpy.typing import NDArray
-from typing import List
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Union
 
 import numpy as np
-import cv2
 
 
 from config.config import Config
 from services.robot_service import RobotService
+from core.models import AttachmentType, SpeedType, StrokePlan
+import utils.path_utils as path_utils
+import utils.motion_utils as motion_utils
+from utils.profiling_utils import timed
 
 class MovementService:
     """Service for managing robot movements."""
-    
+
     def __init__(self, config: Config, robot_service: RobotService):
         self.config = config
         self.robot_service = robot_service
-        
-    def _map_pixel_to_canvas(self, pixel, scaling_factor):
-        min_x = self.config.canvas.min_x
-        min_y = self.config.canvas.min_y
-        max_x = self.config.canvas.max_x
-        max_y = self.config.canvas.max_y
-        
-        x_pixel, y_pixel = pixel
 
-        x_robot = min_x + x_pixel * scaling_factor
-        y_robot = min_y + y_pixel * scaling_factor
+    def _pixel_to_canvas_affine(self, scaling_factor: float) -> NDArray[np.float64]:
+        """
+        2x3 affine taking line image pixels to robot millimetres.
+        """
+        return path_utils.pixel_to_robot_affine(scaling_factor, self.config.canvas.canvas_to_robot_affine)
 
-        x_robot = max(min_x, min(max_x, x_robot))
-        y_robot = max(min_y, min(max_y, y_robot))
+    def _clamp_to_canvas(self, plan: StrokePlan) -> StrokePlan:
+        """
+        Clip every point of a robot-space plan to the canvas bounds.
+        """
+        canvas = self.config.canvas
+        return StrokePlan(np.clip(plan.points, (canvas.min_x, canvas.min_y), (canvas.max_x, canvas.max_y)), plan.offsets)
 
-        return int(x_robot), int(y_robot)
+    def map_plan_to_canvas(self, plan: StrokePlan, line_image: NDArray[np.uint8], clip: bool = True) -> StrokePlan:
+        """
+        Map a whole pixel-space plan to robot millimetres in one transform.
+        """
+        scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+        affine = self._pixel_to_canvas_affine(scaling_factor)
+        robot_plan = StrokePlan(path_utils.apply_affine(plan.points, affine), plan.offsets)
+        return self._clamp_to_canvas(robot_plan) if clip else robot_plan
 
+    def _simplify_tolerance(self, attachment: Optional[AttachmentType] = None) -> float:
+        """
+        Simplification tolerance in mm, a fraction of the attachment's line width.
+        """
+        return self.config.robot.get_attachment_width(attachment) * self.config.movement.simplify_tolerance_ratio
+
+    def prepare_vectors(self, vectors: Union[StrokePlan, List], line_image: NDArray[np.uint8],
+                        simplify: bool = True, attachment: Optional[AttachmentType] = None) -> StrokePlan:
+        """
+        Turn a collection of pixel-space vectors into the robot-space plan that will be followed.
+
+        Points are mapped to robot millimetres but not yet clamped to the canvas,
+        so preflight() can still see points that fall outside it. Simplification
+        runs in millimetres with a tolerance derived from the attachment's line
+        width, so it removes the same physical detail at any image resolution.
+        """
+        if not isinstance(vectors, StrokePlan):
+            vectors = StrokePlan.from_segments(seg for seg in vectors if len(seg))
 
+        robot_plan = self.map_plan_to_canvas(vectors, line_image, clip=False)
+        if simplify:
+            tolerance = self._simplify_tolerance(attachment)
+            simplified = path_utils.simplify_plan(robot_plan, tolerance)
+            if robot_plan.num_points:
+                print(f"✂️  Simplified {robot_plan.num_points} → {simplified.num_points} points "
+                      f"({robot_plan.num_points / max(1, simplified.num_points):.1f}x fewer, tolerance {tolerance:.2f} mm)")
+            robot_plan = simplified
+        return robot_plan
 
-    def _simplify_segment(self, segment, epsilon=2.0):
+    def _blend_radii(self, plan: StrokePlan, attachment: Optional[AttachmentType] = None) -> NDArray[np.float64]:
         """
-        Simplifies a list of (x, y) points using the Ramer-Douglas-Peucker algorithm.
+        Blend radius for every point of a robot-space plan.
         """
-        if len(segment) < 3:
-            return segment  # Not enough points to simplify
+        if self.config.movement.fit_arcs:
+            return path_utils.blend_radii(plan, self._simplify_tolerance(attachment),
+                                          self.config.movement.max_blend_radius_mm)
+        radii = np.full(plan.num_points, self.config.robot.blend_radius)
+        # No blending where the tool comes down or lifts
+        radii[plan.offsets[:-1][plan.lengths > 0]] = -1.0
+        radii[plan.offsets[1:][plan.lengths > 0] - 1] = -1.0
+        return radii
 
-        # Convert to format required by cv2.approxPolyDP
-        pts = np.array(segment, dtype=np.int32).reshape((-1, 1, 2))
-        simplified = cv2.approxPolyDP(pts, epsilon=epsilon, closed=False)
-        
-        return [tuple(pt[0]) for pt in simplified]
-        
-    
-    def follow_vectors(self, vectors: List, line_image: NDArray[np.uint8], simplify: bool = True):
+    def _profile_speeds(self, plan: StrokePlan, radii: NDArray[np.float64]) -> tuple:
         """
-        Follow a collection of vectors on the canvas.
+        Per-point commanded speeds and corner speeds for a robot-space plan.
         """
+        robot = self.config.robot
+        return motion_utils.profile_speeds(plan, radii,
+                                           robot.get_speed(self.config.movement.min_draw_speed),
+                                           robot.get_speed(self.config.movement.max_draw_speed),
+                                           robot.mvacc,
+                                           robot.get_speed(self.config.movement.pen_speed))
+
+    def _estimate_plan_time(self, plan: StrokePlan, attachment: Optional[AttachmentType] = None) -> float:
+        """
+        Estimate the time in seconds to follow a clamped robot-space plan the way
+        follow_plan does: a raised move to each stroke start, a lowering move,
+        the stroke itself and, with profiled speeds, a vertical lift.
+        """
+        robot = self.config.robot
+        movement = self.config.movement
+        if len(plan) == 0:
+            return 0.0
+        z_heights = robot.attachment_z_heights[attachment or robot.current_attachment]
+        z_travel = z_heights["raised"] - z_heights["lowered"]
+        firsts = plan.offsets[:-1][plan.lengths > 0]
+
+        if movement.profile_speeds:
+            speeds, corner = self._profile_speeds(plan, self._blend_radii(plan, attachment))
+            draw_s = motion_utils.profiled_duration(plan, speeds, corner, robot.mvacc)
+            # Lowering onto and lifting off every stroke at the pen speed
+            lowering_s = 2 * len(firsts) * motion_utils.move_duration(z_travel, robot.get_speed(movement.pen_speed),
+                                                                      robot.mvacc)
+            travel_s = np.sum(motion_utils.move_duration(path_utils.pen_up_distances(plan),
+                                                         robot.get_speed(movement.travel_speed), robot.mvacc))
+        else:
+            speed = robot.get_speed(SpeedType.NORMAL)
+            draw_s = np.sum(motion_utils.move_duration(path_utils.stroke_lengths(plan), speed, robot.mvacc))
+            lowering_s = len(plan) * motion_utils.move_duration(z_travel, speed, robot.mvacc)
+            # Travel leaves each stroke end at the lowered height and arrives raised
+            travel = np.hypot(path_utils.pen_up_distances(plan), z_travel)
+            travel_s = np.sum(motion_utils.move_duration(travel, speed, robot.mvacc))
+        return float(draw_s + lowering_s + travel_s)
+
+    @timed()
+    def preflight(self, plan: StrokePlan, attachment: Optional[AttachmentType] = None,
+                  committed_s: float = 0.0) -> Dict[str, float]:
+        """
+        Check a prepared plan before the arm moves and estimate how long it will take.
+
+        Every point is checked against the canvas bounds, and the duration is
+        estimated with the same blend radii and speed profile follow_plan uses.
+        Raises ValueError when the estimate exceeds the time budget and the
+        over-budget policy is "refuse". When a drawing is checked in parts,
+        `committed_s` is the estimate of the parts already sent and counts
+        towards the budget.
+        """
+        start = time.perf_counter()
+        canvas = self.config.canvas
+
+        inside = canvas.is_within_bounds(plan.points[:, 0], plan.points[:, 1])
+        # Points outside the canvas are clamped when followed, so measure the clamped plan
+        executed = self._clamp_to_canvas(plan)
+
+        lifts = len(plan)
+        estimated_s = self._estimate_plan_time(executed, attachment)
+
+        report = {
+            "strokes": len(plan),
+            "points": plan.num_points,
+            "out_of_bounds_points": int(np.count_nonzero(~inside)),
+            "pen_down_mm": float(path_utils.stroke_lengths(executed).sum()),
+            "pen_up_mm": path_utils.pen_up_distance(executed),
+            "lifts": lifts,
+            "estimated_s": estimated_s,
+        }
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        print(f"🛫 Pre-flight: {report['strokes']} strokes, {report['pen_down_mm']:.0f} mm pen-down, "
+              f"{report['pen_up_mm']:.0f} mm pen-up, {lifts} lifts, "
+              f"est. {estimated_s / 60:.1f} min ({elapsed_ms:.1f} ms)")
+        if report["out_of_bounds_points"]:
+            print(f"⚠️  {report['out_of_bounds_points']} of {report['points']} points fall outside the canvas "
+                  f"and will be clamped to its edge")
 
-        canvas_width, canvas_height = self.config.canvas.dimensions
-        
-        drawing_height, drawing_width = line_image.shape[:2]
-        
-        scale_x = canvas_width / drawing_width
-        scale_y = canvas_height / drawing_height
-        scaling_factor = min(scale_x, scale_y)
+        self._check_budget(estimated_s, committed_s)
+        return report
 
-        for seg in vectors:
-            if not seg:
+    def _check_budget(self, estimated_s: float, committed_s: float = 0.0):
+        """
+        Apply the over-budget policy when `estimated_s` on top of `committed_s`
+        first goes over the time budget.
+        """
+        budget = self.config.movement.time_budget_s
+        policy = self.config.movement.over_budget_policy
+        if policy not in ("warn", "refuse"):
+            raise ValueError(f"Unknown over-budget policy: {policy}")
+        total_s = committed_s + estimated_s
+        if budget is not None and total_s > budget >= committed_s:
+            message = f"Estimated drawing time {total_s:.0f} s exceeds the {budget:.0f} s budget"
+            if policy == "refuse":
+                raise ValueError(message)
+            print(f"⚠️  {message}")
+
+    @timed()
+    def follow_plan(self, plan: StrokePlan, attachment: Optional[AttachmentType] = None) -> Future:
+        """
+        Follow a robot-space plan from prepare_vectors(), clamped to the canvas.
+
+        With MovementConfig.fit_arcs, every vertex is blended with the largest
+        arc that stays within the simplification tolerance, so smooth curves are
+        followed without slowing at each point. With MovementConfig.profile_speeds,
+        every move gets its own speed and pen-up travel runs at the travel speed.
+
+        Returns:
+            Future resolved once the arm has finished the plan, so callers can
+            do other work while the last queued moves are executed
+        """
+        canvas_plan = self._clamp_to_canvas(plan)
+        simulated = getattr(self.robot_service.arm, "simulated_time", None)
+        done = self._send_plan(canvas_plan, attachment)
+
+        if simulated is not None:
+            print(f"⏱️  Predicted {self._estimate_plan_time(canvas_plan, attachment):.1f} s, "
+                  f"simulated {self.robot_service.arm.simulated_time - simulated:.1f} s")
+        return done
+
+    def _send_plan(self, canvas_plan: StrokePlan, attachment: Optional[AttachmentType] = None) -> Future:
+        """
+        Queue every stroke of a clamped robot-space plan on the arm.
+
+        Returns:
+            Future of the last stroke, resolved once the arm has drawn it
+        """
+        movement = self.config.movement
+        radii = self._blend_radii(canvas_plan, attachment)
+        speeds = None
+        travel_speed = SpeedType.NORMAL
+        if movement.profile_speeds:
+            # Profiled speeds cover the in-plane moves; the pen goes down and up at pen_speed
+            speeds, _ = self._profile_speeds(canvas_plan, radii)
+            travel_speed = movement.travel_speed
+
+        done = None
+        for i, stroke in enumerate(canvas_plan):
+            if len(stroke) == 0:
                 continue
+            start, end = canvas_plan.offsets[i], canvas_plan.offsets[i + 1]
+            stroke = stroke.tolist()
+
+            start_x, start_y = stroke[0]
+            self.robot_service.move_canvas_position(start_x, start_y, speed=travel_speed)
+
+            # Queue the lowered stroke in one go with blended moves
+            done = self.robot_service.submit_polyline(stroke, radius=radii[start:end].tolist(),
+                                                      speeds=None if speeds is None else speeds[start:end].tolist())
+            if speeds is not None:
+                # Lift straight up before the fast pen-up travel
+                end_x, end_y = stroke[-1]
+                self.robot_service.move_canvas_position(end_x, end_y, speed=movement.pen_speed)
+        return done if done is not None else self.robot_service.track_motion()
+
+    @timed()
+    def follow_stroke_stream(self, chunks: Iterable[StrokePlan], line_image: NDArray[np.uint8],
+                             simplify: bool = True, attachment: Optional[AttachmentType] = None) -> Dict[str, float]:
+        """
+        Follow pixel-space stroke chunks as they arrive, e.g. from PathPlanningService.iter_strokes().
+
+        Each chunk is mapped, simplified, estimated and sent before the next one
+        is requested, so the arm starts once the first chunk is planned and only
+        one chunk is held here at a time. The time budget is checked against the
+        running estimate; under the "refuse" policy a ValueError stops the stream
+        before the chunk that would exceed it, after earlier chunks have been drawn.
 
+        Returns:
+            Dictionary with strokes, points, out_of_bounds_points, estimated_s
+            and first_stroke_s (seconds until the first chunk was sent)
+        """
+        start = time.perf_counter()
+        simulated = getattr(self.robot_service.arm, "simulated_time", None)
+        report = {"strokes": 0, "points": 0, "out_of_bounds_points": 0, "estimated_s": 0.0, "first_stroke_s": 0.0}
+        tolerance = self._simplify_tolerance(attachment)
+
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            robot_plan = self.map_plan_to_canvas(chunk, line_image, clip=False)
             if simplify:
-                seg = self._simplify_segment(seg)
+                robot_plan = path_utils.simplify_plan(robot_plan, tolerance)
+            inside = self.config.canvas.is_within_bounds(robot_plan.points[:, 0], robot_plan.points[:, 1])
+            canvas_plan = self._clamp_to_canvas(robot_plan)
 
+            if self.config.movement.preflight:
+                estimated_s = self._estimate_plan_time(canvas_plan, attachment)
+                self._check_budget(estimated_s, report["estimated_s"])
+                report["estimated_s"] += estimated_s
+            self._send_plan(canvas_plan, attachment)
 
-            first_pt = seg[0]
-            start_x, start_y = self._map_pixel_to_canvas(first_pt, scaling_factor)
-            
-            self.robot_service.move_canvas_position(start_x, start_y)
+            if report["strokes"] == 0:
+                report["first_stroke_s"] = time.perf_counter() - start
+            report["strokes"] += len(canvas_plan)
+            report["points"] += canvas_plan.num_points
+            report["out_of_bounds_points"] += int(np.count_nonzero(~inside))
 
-            for pt in seg:
-                x_robot, y_robot = self._map_pixel_to_canvas(pt, scaling_factor)
-                self.robot_service.move_canvas_position(x_robot, y_robot, raised=False)
+        print(f"🌊 Streamed {report['strokes']} strokes ({report['points']} points), "
+              f"first stroke sent after {report['first_stroke_s'] * 1000:.0f} ms, "
+              f"est. {report['estimated_s'] / 60:.1f} min")
+        if report["out_of_bounds_points"]:
+            print(f"⚠️  {report['out_of_bounds_points']} of {report['points']} points fell outside the canvas "
+                  f"and were clamped to its edge")
+        if simulated is not None:
+            print(f"⏱️  Simulated {self.robot_service.arm.simulated_time - simulated:.1f} s")
+        return report
 
-            self.robot_service.move_canvas_position(x_robot, y_robot, raised=False)
\ No newline at end of file
+    @timed()
+    def follow_vectors(self, vectors: Union[StrokePlan, List], line_image: NDArray[np.uint8], simplify: bool = True,
+                       preflight: bool = True):
+        """
+        Follow a collection of pixel-space vectors on the canvas.
+
+        The whole plan is mapped from pixels to robot coordinates in one batch
+        and checked with preflight() before the first move.
+        """
+        plan = self.prepare_vectors(vectors, line_image, simplify)
+        if preflight and self.config.movement.preflight:
+            self.preflight(plan)
+        self.follow_plan(plan)
@@ -1,13 +1,39 @@
+import hashlib
+import io
+import time
+from dataclasses import asdict
+from typing import Iterator, Optional, Tuple
+
 import numpy as np
 from numpy.typing import NDArray
 
-from scipy.spatial import distance
+import cv2
+from scipy.spatial import cKDTree
 
 
 from config.config import Config
 from services.image_processing_service import ImageProcessingService
 
 import utils.image_utils as image_utils
+import utils.path_utils as path_utils
+import utils.motion_utils as motion_utils
+import utils.tile_utils as tile_utils
+from utils.profiling_utils import span, timed
+from utils.cache_utils import DiskCache
+from core.models import SpeedType, StrokePlan
+
+
+# PathPlanningConfig fields that change the stroke plan, and so the cache key
+PLAN_SETTINGS = ("contour_backend", "optimise_stroke_order", "two_opt_passes", "two_opt_window",
+                 "two_opt_neighbours", "merge_strokes", "merge_tolerance_mm")
+
+def _trace_tile(config: Config, tile: NDArray[np.uint8], left: int, top: int) -> StrokePlan:
+    """
+    Process pool worker: trace one tile of a line image and move it to image coordinates.
+    """
+    plan = PathPlanningService(config, None)._trace_contours(tile)
+    plan.points += np.array([left, top], dtype=plan.points.dtype)
+    return plan
 
 
 class PathPlanningService:
@@ -15,18 +41,368 @@ class PathPlanningService:
     
         self.config = config
         self.image_processing_service = image_processing_service
+        self.plan_cache = DiskCache(self.config.path_planning.plan_cache_dir,
+                                    int(self.config.path_planning.plan_cache_max_mb * 1024 * 1024),
+                                    suffix=".npz")
+    
+    @timed()
+    def plan_image(self, image: NDArray[np.uint8], line_art: Optional[str] = None) -> tuple:
+        """
+        Convert an image into an ordered stroke plan ready for motion.
+        
+        `line_art` picks the line-art algorithm, defaulting to ImageProcessingConfig.line_art.
+        Plans are cached on disk by image content and processing settings, so
+        drawing the same image again skips line extraction and path planning.
+        
+        Returns:
+            Tuple of (plan, line_image)
+        """
+        cached = self.get_cached_plan(image, line_art)
+        if cached is not None:
+            return cached
+        
+        line_image = self.image_processing_service.convert_to_line_image(image, line_art)
+        plan = self.convert_image_to_vectors(line_image)
+        plan = self.order_strokes(plan, line_image)
+        plan = self.merge_strokes(plan, line_image)
+        
+        self.cache_plan(image, plan, line_image, line_art)
+        return plan, line_image
+    
+    def cache_plan(self, image: NDArray[np.uint8], plan: StrokePlan, line_image: NDArray[np.uint8],
+                   line_art: Optional[str] = None):
+        """
+        Store the plan of an image, e.g. one assembled from streamed chunks, for get_cached_plan.
+        """
+        if self.config.path_planning.plan_cache_enabled:
+            self.plan_cache.put(self._plan_cache_key(image, line_art), self._encode_plan(plan, line_image))
+    
+    def get_cached_plan(self, image: NDArray[np.uint8], line_art: Optional[str] = None) -> Optional[tuple]:
+        """
+        Get the cached (plan, line_image) for an image, or None if it has not been planned.
+        """
+        if not self.config.path_planning.plan_cache_enabled:
+            return None
+        cached = self.plan_cache.get(self._plan_cache_key(image, line_art))
+        if cached is None:
+            return None
+        plan, line_image = self._decode_plan(cached)
+        print(f"🗂️  Using cached stroke plan ({len(plan)} strokes)")
+        return plan, line_image
+    
+    def _plan_cache_key(self, image: NDArray[np.uint8], line_art: Optional[str] = None) -> str:
+        """
+        Cache key for the plan of an image under the current settings.
+        """
+        image = np.ascontiguousarray(image)
+        image_processing = asdict(self.config.image_processing)
+        image_processing["line_art"] = line_art or image_processing["line_art"]
+        return DiskCache.make_key(
+            image=hashlib.sha256(image.tobytes()).hexdigest(),
+            shape=image.shape,
+            dtype=str(image.dtype),
+            canvas=self.config.canvas.dimensions,
+            image_processing=image_processing,
+            path_planning={name: getattr(self.config.path_planning, name) for name in PLAN_SETTINGS},
+        )
+    
+    def _encode_plan(self, plan: StrokePlan, line_image: NDArray[np.uint8]) -> bytes:
+        """
+        Pack a plan as flat int32 points, stroke offsets and a bit-packed line image.
+        """
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer,
+                            points=plan.points.astype(np.int32, copy=False),
+                            offsets=plan.offsets,
+                            line_shape=np.array(line_image.shape),
+                            line_bits=np.packbits(line_image != 0))
+        return buffer.getvalue()
+    
+    def _decode_plan(self, data: bytes) -> tuple:
+        """
+        Unpack a plan stored by _encode_plan.
+        """
+        with np.load(io.BytesIO(data)) as stored:
+            plan = StrokePlan(stored["points"], stored["offsets"])
+            shape = tuple(stored["line_shape"])
+            bits = np.unpackbits(stored["line_bits"], count=int(np.prod(shape)))
+        
+        line_image = bits.reshape(shape).astype(np.uint8) * 255
+        return plan, line_image
             
-    def convert_image_to_vectors(self, line_image: NDArray[np.uint8]) -> list:
+    @timed()
+    def convert_image_to_vectors(self, line_image: NDArray[np.uint8]) -> StrokePlan:
         """
         Convert a image to a vector collection.
         """
                 
         return self._extract_contours(line_image)
+    
+    @timed()
+    def order_strokes(self, plan: StrokePlan, line_image: NDArray[np.uint8],
+                      origin: Optional[Tuple[float, float]] = None) -> StrokePlan:
+        """
+        Reorder (and reverse where useful) strokes to minimise pen-up travel.
+        
+        Uses a greedy nearest-endpoint tour followed by 2-opt improvement. When
+        `origin` (pixels) is given, the tour starts from the stroke nearest to it.
+        """
+        if not self.config.path_planning.optimise_stroke_order or len(plan) < 2:
+            return plan
+        
+        scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+        before = path_utils.pen_up_distance(plan) * scaling_factor
+        
+        order, flipped = path_utils.order_strokes_greedy(plan.starts.astype(np.float64), plan.ends.astype(np.float64),
+                                                         origin=origin)
+        greedy = plan.reordered(order, flipped)
+        
+        order, flipped = path_utils.two_opt_strokes(greedy.starts.astype(np.float64), greedy.ends.astype(np.float64),
+                                                    max_passes=self.config.path_planning.two_opt_passes,
+                                                    window=self.config.path_planning.two_opt_window,
+                                                    neighbours=self.config.path_planning.two_opt_neighbours,
+                                                    origin=origin)
+        ordered = greedy.reordered(order, flipped)
+        
+        after = path_utils.pen_up_distance(ordered) * scaling_factor
+        print(f"🧭 Stroke ordering: pen-up travel {before:.0f} mm → {after:.0f} mm ({len(ordered)} strokes)")
+        
+        return ordered
+    
+    def iter_strokes(self, line_image: NDArray[np.uint8]) -> Iterator[StrokePlan]:
+        """
+        Trace and order a line image lazily, yielding small ordered chunks of strokes.
+        
+        The image is traced in strips of `stream_strip_rows` rows. Traced strokes
+        wait in a pool, and the next stroke is the free one nearest to the pen
+        once everything up to `stream_lookahead_rows` below the pen has been
+        traced (a windowed greedy tour). Every `stream_chunk_strokes` strokes are
+        2-opt improved, merged and yielded, so drawing can start after the first
+        few strips and only the pool is held in memory.
+        
+        Strokes crossing a strip edge are split there. Images large enough to be
+        tiled (see tile_utils.tile_workers) are instead traced whole on the tile
+        pool, with strokes stitched across seams, and each stroke joins the pool
+        with the strip holding its top row.
+        """
+        settings = self.config.path_planning
+        height = line_image.shape[0]
+        strip_rows = max(1, settings.stream_strip_rows)
+        chunk_strokes = max(1, settings.stream_chunk_strokes)
+        scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+        
+        start = time.perf_counter()
+        first_chunk_ms = None
+        stroke_count = 0
+        pen_up = 0.0
+        
+        pool = StrokePlan.empty()
+        free = np.zeros(0, dtype=bool)
+        traced_rows = 0
+        pen = np.zeros(2)
+        origin = None
+        chunk = []
+        
+        traced = None
+        workers = tile_utils.tile_workers(self.config.image_processing, line_image.shape)
+        if workers > 1:
+            traced = self._extract_contours_tiled(line_image, workers)
+            traced = traced.select(traced.lengths > 0)
+            tops = (np.minimum.reduceat(traced.points[:, 1], traced.offsets[:-1])
+                    if len(traced) else np.zeros(0, dtype=np.int64))
+            by_top = np.argsort(tops, kind="stable")
+            traced, tops = traced.reordered(by_top), tops[by_top]
+        
+        while True:
+            # Trace far enough ahead that the pen sees every stroke it could reach
+            while traced_rows < height and (traced_rows < pen[1] + settings.stream_lookahead_rows or not free.any()):
+                with span("PathPlanningService.trace_strip"):
+                    if traced is None:
+                        strip = self._extract_contours(line_image[traced_rows:traced_rows + strip_rows])
+                        strip.points[:, 1] += traced_rows
+                    else:
+                        first, last = np.searchsorted(tops, [traced_rows, traced_rows + strip_rows])
+                        strip = traced.reordered(np.arange(first, last))
+                    pool = StrokePlan.concatenate([pool.select(free), strip])
+                    free = np.ones(len(pool), dtype=bool)
+                traced_rows += strip_rows
+            
+            done = not free.any()
+            if not done:
+                if settings.optimise_stroke_order:
+                    index, flipped = path_utils.nearest_stroke(pool.starts[free], pool.ends[free], pen)
+                    index = int(np.flatnonzero(free)[index])
+                else:
+                    index, flipped = int(np.argmax(free)), False
+                free[index] = False
+                stroke = pool[index][::-1] if flipped else pool[index]
+                chunk.append(stroke)
+                pen = stroke[-1].astype(np.float64)
+            
+            if chunk and (done or len(chunk) >= chunk_strokes):
+                with span("PathPlanningService.finish_chunk"):
+                    plan = self._finish_chunk(StrokePlan.from_segments(chunk), line_image, origin)
+                origin = pen = plan.ends[-1].astype(np.float64)
+                chunk = []
+                
+                stroke_count += len(plan)
+                pen_up += path_utils.pen_up_distance(plan) * scaling_factor
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.perf_counter() - start) * 1000
+                yield plan
+            if done:
+                break
+        
+        print(f"🌊 Stroke streaming: {stroke_count} strokes, pen-up travel {pen_up:.0f} mm within chunks, "
+              f"first chunk after {first_chunk_ms or 0.0:.0f} ms")
+    
+    def _finish_chunk(self, plan: StrokePlan, line_image: NDArray[np.uint8],
+                      origin: Optional[NDArray[np.float64]]) -> StrokePlan:
+        """
+        2-opt improve and merge one chunk of an iter_strokes() tour, starting from `origin`.
+        """
+        settings = self.config.path_planning
+        if settings.optimise_stroke_order and len(plan) > 1:
+            order, flipped = path_utils.two_opt_strokes(plan.starts.astype(np.float64), plan.ends.astype(np.float64),
+                                                        max_passes=settings.two_opt_passes,
+                                                        window=settings.two_opt_window,
+                                                        neighbours=settings.two_opt_neighbours,
+                                                        origin=origin)
+            plan = plan.reordered(order, flipped)
+        if settings.merge_strokes and len(plan) > 1:
+            scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+            plan = plan.joined(path_utils.pen_up_distances(plan) * scaling_factor <= settings.merge_tolerance_mm)
+        return plan
+    
+    @timed()
+    def merge_strokes(self, plan: StrokePlan, line_image: NDArray[np.uint8]) -> StrokePlan:
+        """
+        Join consecutive strokes whose gap is within the merge tolerance, so the
+        pen stays down across the join instead of lifting for a tiny hop.
+        """
+        if not self.config.path_planning.merge_strokes or len(plan) < 2:
+            return plan
+        
+        scaling_factor = path_utils.compute_scaling_factor(line_image.shape, self.config.canvas.dimensions)
+        gaps = path_utils.pen_up_distances(plan) * scaling_factor
+        join = gaps <= self.config.path_planning.merge_tolerance_mm
+        merged = plan.joined(join)
+        print(f"🔗 Stroke merging: {int(join.sum())} pen lifts eliminated ({len(plan)} → {len(merged)} strokes)")
+        
+        return merged
        
        
-    def _extract_contours(self, orig_image: NDArray[np.uint8]) -> list:
+    def _extract_contours(self, orig_image: NDArray[np.uint8]) -> StrokePlan:
+        """
+        Extract contours from canny image, tracing large images tile by tile on a process pool.
+        """
+        workers = tile_utils.tile_workers(self.config.image_processing, orig_image.shape)
+        if workers > 1:
+            return self._extract_contours_tiled(orig_image, workers)
+        return self._trace_contours(orig_image)
+    
+    def _extract_contours_tiled(self, orig_image: NDArray[np.uint8], workers: int) -> StrokePlan:
+        """
+        Trace a line image in tiles on `workers` processes and stitch strokes cut at the seams.
+        
+        Tiles do not overlap, so every ink pixel is traced once; a line crossing
+        a seam ends up as two strokes with adjacent endpoints, which are joined.
+        """
+        h, w = orig_image.shape
+        bounds = tile_utils.tile_bounds(h, w, self.config.image_processing.tile_size)
+        tasks = [(self.config, orig_image[top:bottom, left:right], left, top) for top, bottom, left, right in bounds]
+        plans = tile_utils.map_tiles(_trace_tile, tasks, workers)
+        
+        tiles = np.repeat(np.arange(len(plans)), [len(plan) for plan in plans])
+        plan = StrokePlan.concatenate(plans)
+        stitched = path_utils.stitch_strokes(plan, tiles)
+        print(f"🧩 Tiled tracing: {len(bounds)} tiles on {min(workers, len(bounds))} processes, "
+              f"{len(plan) - len(stitched)} strokes joined across seams")
+        return stitched
+    
+    def _trace_contours(self, orig_image: NDArray[np.uint8]) -> StrokePlan:
+        """
+        Extract contours from canny image using the configured backend.
+        """
+        backend = self.config.path_planning.contour_backend
+        if backend == "labelled":
+            return self._extract_contours_labelled(orig_image)
+        elif backend == "dfs":
+            return self._extract_contours_dfs(orig_image)
+        raise ValueError(f"Unknown contour backend: {backend}")
+
+    def _extract_contours_labelled(self, orig_image: NDArray[np.uint8]) -> StrokePlan:
         """
-        Extract contours from canny image.
+        Extract contours from canny image using connected-component labelling
+        and a traversal over a precomputed neighbour table.
+        
+        Every ink pixel of a component with more than one pixel ends up in a
+        segment of at least 2 points, and consecutive points are 8-adjacent.
+        """
+        h, w = orig_image.shape
+        mask = (orig_image != 0).astype(np.uint8)
+        _, labels = cv2.connectedComponents(mask, connectivity=8, ltype=cv2.CV_32S)
+        
+        ys, xs = np.nonzero(mask)  # raster order
+        n = len(ys)
+        if n == 0:
+            return StrokePlan.empty()
+        
+        # Map each ink pixel to its index; the 1px border keeps lookups in range.
+        index_map = np.full((h + 2, w + 2), -1, dtype=np.int64)
+        index_map[ys + 1, xs + 1] = np.arange(n)
+        
+        # Orthogonal neighbours first so staircases are not cut diagonally.
+        neighbour_offsets = [( 0, 1), ( 1, 0), ( 0, -1), (-1, 0),
+                             ( 1, 1), ( 1, -1), (-1, 1), (-1, -1)]
+        neighbours = np.stack(
+            [index_map[ys + 1 + di, xs + 1 + dj] for di, dj in neighbour_offsets], axis=1
+        )
+        degree = (neighbours >= 0).sum(axis=1)
+        
+        # Start points grouped by component (labels follow raster order),
+        # line endpoints before interior pixels, then raster order.
+        starts = np.lexsort((np.arange(n), degree != 1, labels[ys, xs]))
+        
+        neighbour_lists = [[k for k in row if k >= 0] for row in neighbours.tolist()]
+        visited = bytearray(n)
+        # Traced pixel indices for every segment back to back, plus segment offsets
+        path = []
+        offsets = [0]
+        
+        for start in starts.tolist():
+            if visited[start]:
+                continue
+            segment_start = len(path)
+            # Branches leaving an already traced pixel stay attached to it.
+            for k in neighbour_lists[start]:
+                if visited[k]:
+                    path.append(k)
+                    break
+            
+            current = start
+            while current is not None:
+                visited[current] = 1
+                path.append(current)
+                nxt = None
+                for k in neighbour_lists[current]:
+                    if not visited[k]:
+                        nxt = k
+                        break
+                current = nxt
+            
+            # Only add segments with at least 2 points.
+            if len(path) - segment_start > 1:
+                offsets.append(len(path))
+            else:
+                del path[segment_start:]
+        
+        coords = np.stack([xs, ys], axis=1).astype(np.int32)  # store as (x, y)
+        return StrokePlan(coords[np.asarray(path, dtype=np.int64)], np.asarray(offsets, dtype=np.int64))
+
+    def _extract_contours_dfs(self, orig_image: NDArray[np.uint8]) -> StrokePlan:
+        """
+        Extract contours from canny image with a per-pixel depth-first search.
         """
         h, w = orig_image.shape
         visited = np.zeros((h, w), dtype=bool)
@@ -54,44 +430,6 @@ class PathPlanningService:
                             stack.append((ni, nj))
             return contour
 
-        def reorder_contour(points):
-            """
-            Reorder a list of points using a nearest neighbor approach. If the nearest unvisited
-            point is too far (exceeding a maximum squared distance), break the chain and start
-            a new segment.
-            """
-            # Maximum allowed squared distance between connected points.
-            # Since adjacent pixels are 1 or sqrt(2) apart, a threshold of 5 works well.
-            max_distance_sq = 5  
-            segments = []
-            # Work on a copy so as not to modify the original list.
-            points = points.copy()
-            
-            while points:
-                current_segment = []
-                # Start with the first available point.
-                current = points.pop(0)
-                current_segment.append(current)
-                while points:
-                    nearest_index = None
-                    nearest_distance = None
-                    for i, pt in enumerate(points):
-                        dx = pt[0] - current[0]
-                        dy = pt[1] - current[1]
-                        dist_sq = dx*dx + dy*dy
-                        if nearest_distance is None or dist_sq < nearest_distance:
-                            nearest_distance = dist_sq
-                            nearest_index = i
-                    # If the nearest point is within the allowed distance, add it.
-                    if nearest_distance is not None and nearest_distance <= max_distance_sq:
-                        current = points.pop(nearest_index)
-                        current_segment.append(current)
-                    else:
-                        # Otherwise, break this segment and start a new one.
-                        break
-                segments.append(current_segment)
-            return segments
-
         # Iterate over every pixel.
         for i in range(h):
             for j in range(w):
@@ -99,75 +437,233 @@ class PathPlanningService:
                     raw_contour = dfs(i, j)
                     if len(raw_contour) > 1:
                         # Reorder the DFS points using nearest neighbor.
-                        ordered_segments = reorder_contour(raw_contour)
+                        ordered_segments = self._reorder_contour(raw_contour)
                         for seg in ordered_segments:
                             # Only add segments with at least 2 points.
                             if len(seg) > 1:
                                 contours.append(seg)
-        return contours
+        return StrokePlan.from_segments(contours)
+    
+    def _reorder_contour(self, points: list) -> list:
+        """
+        Reorder a list of points using a nearest neighbor approach. If the nearest unvisited
+        point is too far (exceeding a maximum squared distance), break the chain and start
+        a new segment.
+        
+        Neighbour candidates come from a KD-tree radius query, so each step only
+        inspects the few points within the break distance instead of every
+        remaining point.
+        """
+        # Maximum allowed squared distance between connected points.
+        # Since adjacent pixels are 1 or sqrt(2) apart, a threshold of 5 works well.
+        max_distance_sq = 5
+        n = len(points)
+        segments = []
+        if n == 0:
+            return segments
+        
+        tree = cKDTree(np.asarray(points))
+        candidates = tree.query_ball_point(points, r=np.sqrt(max_distance_sq) + 1e-6)
+        
+        visited = bytearray(n)
+        remaining = n
+        next_start = 0
+        
+        while remaining:
+            # Start with the first available point.
+            while visited[next_start]:
+                next_start += 1
+            current = next_start
+            visited[current] = 1
+            remaining -= 1
+            current_segment = [points[current]]
+            
+            while remaining:
+                cx, cy = points[current]
+                nearest_index = None
+                nearest_distance = None
+                for k in candidates[current]:
+                    if visited[k]:
+                        continue
+                    dx = points[k][0] - cx
+                    dy = points[k][1] - cy
+                    dist_sq = dx*dx + dy*dy
+                    # Ties go to the earliest point, as in a linear scan.
+                    if (nearest_distance is None or dist_sq < nearest_distance or
+                            (dist_sq == nearest_distance and k < nearest_index)):
+                        nearest_distance = dist_sq
+                        nearest_index = k
+                # If the nearest point is within the allowed distance, add it.
+                if nearest_distance is not None and nearest_distance <= max_distance_sq:
+                    current = nearest_index
+                    visited[current] = 1
+                    remaining -= 1
+                    current_segment.append(points[current])
+                else:
+                    # Otherwise, break this segment and start a new one.
+                    break
+            segments.append(current_segment)
+        return segments
     
-    def plan_erase_path(self, image: NDArray[np.uint8]) -> list:
+    @timed()
+    def plan_erase_path(self, image: NDArray[np.uint8]) -> StrokePlan:
         """
-        Plan an erase path for the given image.
+        Plan an erase path for the given image using the configured strategy.
+        """
+        strategy = self.config.path_planning.erase_strategy
+        if strategy == "coverage":
+            return self._plan_coverage_erase(image)
+        elif strategy == "sweep":
+            return self._plan_sweep_erase(image)
+        raise ValueError(f"Unknown erase strategy: {strategy}")
+    
+    def _plan_coverage_erase(self, image: NDArray[np.uint8]) -> StrokePlan:
         """
-        eraser_w_px = 80
-        eraser_h_px = 40
+        Plan an erase path that visits eraser-sized cells containing ink.
+        """
+        eraser_w_px = self.config.path_planning.eraser_width_px
+        eraser_h_px = self.config.path_planning.eraser_height_px
         bin_img = image_utils.binarize_drawing(image)        
+        
+        start = time.perf_counter()
+        centers, rects, stats = self._plan_eraser_centers(bin_img, eraser_w_px, eraser_h_px)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        vectors = StrokePlan.from_segments([centers] if centers else [])
+        
+        print(f"🧽 Erase plan: {stats['passes']} eraser positions covering "
+              f"{stats['coverage']:.0%} of {stats['ink_pixels']} ink pixels "
+              f"({elapsed_ms:.1f} ms, est. {self._estimate_erase_time(vectors, image):.0f} s)")
+        
+        return vectors
+    
+    def _plan_sweep_erase(self, image: NDArray[np.uint8]) -> StrokePlan:
+        """
+        Plan a boustrophedon sweep over the whole canvas in eraser-width lanes.
+        
+        Lanes run along the longer canvas side. Lanes without ink are skipped and
+        each dirty lane is trimmed to its inked extent; neighbouring dirty lanes
+        are joined into one continuous lowered stroke.
+        """
+        start = time.perf_counter()
+        ink = image_utils.binarize_drawing(image) > 0
+        scaling_factor = path_utils.compute_scaling_factor(image.shape, self.config.canvas.dimensions)
+        canvas_width, canvas_height = self.config.canvas.dimensions
+        
+        # Work with lanes as image columns; transpose when they run along x instead
+        vertical_lanes = canvas_height >= canvas_width
+        if not vertical_lanes:
+            ink = ink.T
+            canvas_width, canvas_height = canvas_height, canvas_width
+        length_px, across_px = ink.shape
+        
+        lane_px = max(1, int(round(self.config.path_planning.eraser_lane_width_mm / scaling_factor)))
+        n_lanes = int(np.ceil(canvas_width / self.config.path_planning.eraser_lane_width_mm))
+        lane_edges = np.minimum(np.arange(n_lanes + 1) * lane_px, across_px)
+        
+        # Lanes beyond the captured image have no ink information and are skipped
+        col_ink = ink.any(axis=0)
+        vectors = []
+        stroke = []
+        previous_lane = None
+        downward = True
+        dirty_lanes = 0
+        for lane in range(n_lanes):
+            c0, c1 = lane_edges[lane], lane_edges[lane + 1]
+            if c1 <= c0 or not col_ink[c0:c1].any():
+                continue
+            dirty_lanes += 1
             
-        centers, rects = self._plan_eraser_centers(bin_img, eraser_w_px, eraser_h_px)
-        vectors = [centers]
+            rows = np.flatnonzero(ink[:, c0:c1].any(axis=1))
+            margin = lane_px // 2
+            y0 = int(max(0, rows[0] - margin))
+            y1 = int(min(length_px - 1, rows[-1] + margin))
+            x = int((c0 + c1) // 2)
+            
+            if previous_lane is not None and lane != previous_lane + 1:
+                vectors.append(stroke)
+                stroke = []
+            lane_points = [(x, y0), (x, y1)] if downward else [(x, y1), (x, y0)]
+            stroke.extend(lane_points)
+            downward = not downward
+            previous_lane = lane
+        if stroke:
+            vectors.append(stroke)
+        
+        vectors = StrokePlan.from_segments(vectors)
+        if not vertical_lanes:
+            vectors = StrokePlan(np.ascontiguousarray(vectors.points[:, ::-1]), vectors.offsets)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"🧽 Sweep erase: {dirty_lanes}/{n_lanes} lanes dirty, {len(vectors)} strokes "
+              f"({elapsed_ms:.1f} ms, est. {self._estimate_erase_time(vectors, image):.0f} s)")
         
         return vectors
     
-    def _plan_eraser_centers(bin_img, rect_w, rect_h):
+    def _estimate_erase_time(self, vectors: StrokePlan, image: NDArray[np.uint8]) -> float:
         """
-        Plan minimal-movement eraser path using dynamic region coverage.
-        Ensures all ink is erased, avoids unnecessary extra steps.
+        Estimate the time in seconds to follow erase vectors on the canvas.
         """
-        h, w = bin_img.shape
-        covered = np.zeros_like(bin_img, dtype=bool)
-
-        # 1. Get all ink pixel coordinates
-        ink_coords = np.argwhere(bin_img > 0)
-        if len(ink_coords) == 0:
-            return [], []
-
+        scaling_factor = path_utils.compute_scaling_factor(image.shape, self.config.canvas.dimensions)
+        speed = self.config.robot.get_speed(SpeedType.NORMAL)
+        return motion_utils.estimate_drawing_time(vectors, scaling_factor, speed, speed, self.config.robot.mvacc)
+    
+    def _plan_eraser_centers(self, bin_img: NDArray[np.uint8], rect_w: int, rect_h: int) -> tuple:
+        """
+        Plan eraser positions covering all ink using a coarse grid of eraser-sized cells.
+        
+        Ink per cell is read from an integral image, so the cost is one pass over
+        the image regardless of how much ink there is. Inked cells are visited as a
+        boustrophedon sweep (alternating direction on each row).
+        
+        Returns:
+            Tuple of (centers, rects, stats) with centers as (x, y), rects as their
+            top-left (x, y) corners and stats describing the coverage
+        """
+        ink = bin_img > 0
+        h, w = ink.shape
+        ink_pixels = int(np.count_nonzero(ink))
+        stats = {'ink_pixels': ink_pixels, 'covered_ink_pixels': 0, 'coverage': 1.0,
+                 'passes': 0, 'erased_area_fraction': 0.0}
+        if ink_pixels == 0:
+            return [], [], stats
+        
+        # Anchor the grid on the top-left of the inked region
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        top, left = rows[0], cols[0]
+        n_rows = -(-(rows[-1] + 1 - top) // rect_h)
+        n_cols = -(-(cols[-1] + 1 - left) // rect_w)
+        
+        row_edges = np.minimum(top + np.arange(n_rows + 1) * rect_h, h)
+        col_edges = np.minimum(left + np.arange(n_cols + 1) * rect_w, w)
+        
+        # Ink count of every cell from the integral image
+        integral = cv2.integral(ink.astype(np.uint8))
+        corners = integral[np.ix_(row_edges, col_edges)]
+        cell_ink = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+        
         erase_centers = []
         rects = []
-
-        # 2. Start from top-left ink pixel
-        remaining = set(map(tuple, ink_coords))
-        current = min(remaining, key=lambda pt: pt[1] + pt[0])  # top-left
-        current = tuple(current)
-
-        def mark_covered(center):
-            """Mark the region covered by an erase centered at `center`."""
-            cx, cy = center
-            x1 = max(0, cx - rect_h // 2)
-            y1 = max(0, cy - rect_w // 2)
-            x2 = min(h, cx + rect_h // 2)
-            y2 = min(w, cy + rect_w // 2)
-            covered[x1:x2, y1:y2] = True
-
-        while remaining:
-            cx, cy = current
-            erase_centers.append((cy, cx))  # switch to (x, y) format for consistency
-            rects.append((cy - rect_w // 2, cx - rect_h // 2))
-            mark_covered((cx, cy))
-
-            # 3. Remove covered ink pixels
-            newly_remaining = []
-            for pt in remaining:
-                if not covered[pt]:
-                    newly_remaining.append(pt)
-            remaining = set(newly_remaining)
-
-            if not remaining:
-                break
-
-            # 4. Pick the nearest uncovered ink point to current position
-            dists = distance.cdist([current], list(remaining))
-            current = list(remaining)[np.argmin(dists)]
-
-        return erase_centers, rects
-    
\ No newline at end of file
+        sweep_right = True
+        for r in range(n_rows):
+            inked = np.flatnonzero(cell_ink[r])
+            if len(inked) == 0:
+                continue
+            if not sweep_right:
+                inked = inked[::-1]
+            sweep_right = not sweep_right
+            
+            cy = int(top + r * rect_h + rect_h // 2)
+            for c in inked.tolist():
+                cx = int(left + c * rect_w + rect_w // 2)
+                erase_centers.append((cx, cy))
+                rects.append((cx - rect_w // 2, cy - rect_h // 2))
+        
+        covered = int(cell_ink.sum())
+        stats['covered_ink_pixels'] = covered
+        stats['coverage'] = covered / ink_pixels
+        stats['passes'] = len(erase_centers)
+        stats['erased_area_fraction'] = min(1.0, len(erase_centers) * rect_w * rect_h / (h * w))
+        
+        return erase_centers, rects, stats
@@ -1,24 +1,50 @@
 import numpy as np
 from numpy.typing import NDArray
-from xarm.wrapper import XArmAPI
+try:
+    from xarm.wrapper import XArmAPI
+except Exception:  # pragma: no cover - optional dependency for the simulated backend
+    XArmAPI = None
+import threading
 import time
+from concurrent.futures import Future
+from typing import Optional, Sequence, Union
 
 from config.config import Config
 from core.models import AttachmentType, SpeedType, RobotState
 from utils.robot_error_handler import XArmErrorHandler, RecoveryAction
+from utils.simulated_xarm import SimulatedXArm
+from utils.motion_monitor import MotionMonitor
+from utils.profiling_utils import timed
 
 class RobotService:
     def __init__(self, config: Config):
         self.config = config
         self.arm = None
+        self.motion_monitor = None
         self.error_handler = XArmErrorHandler()
+        # Errors can be seen by the sending thread and the motion monitor at once;
+        # only one of them attempts recovery
+        self._error_lock = threading.RLock()
         self._connect()
 
     def _connect(self):
         """
         Establish a connection to the robot.
         """
-        self.arm = XArmAPI(self.config.robot.ip)
+        backend = self.config.robot.backend
+        if backend == "sim":
+            self.arm = SimulatedXArm(self.config.robot, self.config.robot.sim_command_latency,
+                                     realtime=self.config.robot.sim_realtime,
+                                     realtime_speedup=self.config.robot.sim_realtime_speedup)
+        elif backend == "xarm":
+            if XArmAPI is None:
+                raise ImportError("xarm-python-sdk is required for the 'xarm' robot backend")
+            self.arm = XArmAPI(self.config.robot.ip)
+        else:
+            raise ValueError(f"Unknown robot backend: {backend}")
+        self.motion_monitor = MotionMonitor(self.arm, self.config.robot.max_queued_commands,
+                                            self.config.robot.motion_poll_interval,
+                                            recover=lambda: self._check_and_handle_errors("queued motion"))
         self.arm.clean_warn()
         self.arm.clean_error()
         self.arm.motion_enable(True)
@@ -38,26 +64,27 @@ class RobotService:
         if self.arm is None:
             return False
             
-        # Get error codes
-        error_code = self.arm.error_code
-        warn_code = self.arm.warn_code
-        
-        if error_code == 0:
-            return True
-        
-        # Handle the error
-        can_auto_recover, message, recovery_action = self.error_handler.handle_error(
-            error_code, warn_code, context
-        )
-        
-        print(message)
-        
-        if not can_auto_recover:
-            print("⚠️  Manual intervention required. Please address the issue and restart the robot.")
-            return False
-        
-        # Try to auto-recover
-        return self._attempt_recovery(recovery_action, error_code, context)
+        with self._error_lock:
+            # Get error codes
+            error_code = self.arm.error_code
+            warn_code = self.arm.warn_code
+            
+            if error_code == 0:
+                return True
+            
+            # Handle the error
+            can_auto_recover, message, recovery_action = self.error_handler.handle_error(
+                error_code, warn_code, context
+            )
+            
+            print(message)
+            
+            if not can_auto_recover:
+                print("⚠️  Manual intervention required. Please address the issue and restart the robot.")
+                return False
+            
+            # Try to auto-recover
+            return self._attempt_recovery(recovery_action, error_code, context)
     
     
     ###REVIEW###
@@ -126,6 +153,53 @@ class RobotService:
             print(f"❌ Error during recovery attempt: {e}")
             return False
     
+    def _send_position(self, **kwargs) -> int:
+        """
+        Queue a set_position command once the controller has room for it.
+        """
+        self.motion_monitor.wait_for_space()
+        ret = self.arm.set_position(**kwargs)
+        if ret == 0:
+            self.motion_monitor.command_sent()
+        return ret
+        
+    def submit_polyline(self, points: list, **kwargs) -> Future:
+        """
+        Queue a stroke like execute_polyline() without waiting for it to be drawn.
+        
+        Returns:
+            Future resolved with execute_polyline()'s return code once the arm
+            has finished the stroke (straight away if it could not be queued),
+            or with -1 if a controller error stops it
+        """
+        ret = self.execute_polyline(points, **kwargs)
+        if ret != 0:
+            future = Future()
+            future.set_result(ret)
+            return future
+        return self.motion_monitor.track(ret)
+        
+    def track_motion(self) -> Future:
+        """
+        Future resolved with 0 once every move queued so far has finished, or -1 on a controller error.
+        """
+        return self.motion_monitor.track()
+        
+    def wait_for_motion(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued move has finished.
+        
+        Returns:
+            True once the arm is idle, False if `timeout` seconds passed first
+        """
+        return self.motion_monitor.wait_until_idle(timeout)
+        
+    def queue_depth(self) -> int:
+        """
+        Number of moves waiting in the controller's queue.
+        """
+        return self.motion_monitor.queue_depth()
+        
     def get_error_summary(self) -> str:
         """Get a summary of recent robot errors."""
         return self.error_handler.get_error_summary()
@@ -154,6 +228,7 @@ class RobotService:
         """
         return self.config.robot.current_state
         
+    @timed()
     def move_canvas_position(self, _x:float, _y:float, _z:float = None,
                              raised:bool = True, 
                              speed: SpeedType = SpeedType.NORMAL, 
@@ -175,12 +250,7 @@ class RobotService:
         if yaw is None:
             yaw = self.config.robot.yaw
             
-        if self.get_robot_state() == RobotState.UNKNOWN:
-            self.set_robot_state(RobotState.CALCULATING)
-            self.move_centred_position()
-            
-        elif self.get_robot_state() == RobotState.DOCKED:
-            self.move_centred_position(speed=SpeedType.SLOW)
+        self._leave_resting_state()
             
         self.set_robot_state(RobotState.MOVING)
         
@@ -188,7 +258,7 @@ class RobotService:
         if not self._check_and_handle_errors(f"move_canvas_position to ({_x}, {_y}, {_z})"):
             return -1
         
-        ret = self.arm.set_position(x=_x, 
+        ret = self._send_position(x=_x, 
                                     y=_y, 
                                     z=_z,
                                     roll = roll,
@@ -213,7 +283,7 @@ class RobotService:
             
             # If error was handled, try the movement again
             print("🔄 Retrying movement after error recovery...")
-            ret = self.arm.set_position(x=_x, 
+            ret = self._send_position(x=_x, 
                                         y=_y, 
                                         z=_z,
                                         roll = roll,
@@ -225,6 +295,109 @@ class RobotService:
                                         )
             return ret
             
+    @timed()
+    def execute_polyline(self, points: list, _z: float = None,
+                         raised: bool = False,
+                         speed: SpeedType = SpeedType.NORMAL,
+                         radius: Union[float, Sequence[float], None] = None,
+                         speeds: Optional[Sequence[float]] = None,
+                         roll: float = None,
+                         pitch: float = None,
+                         yaw: float = None) -> int:
+        """
+        Stream a whole stroke into the controller's motion queue as blended moves.
+        
+        State and errors are checked once per stroke rather than once per point,
+        and every vertex between the first and last is blended with `radius`
+        so the arm does not stop at each point. The first point is where the
+        tool comes down and the last where it lifts, so neither is blended.
+        
+        Args:
+            points: Sequence of (x, y) canvas positions
+            radius: Blend radius in mm, or one radius per point where negative
+                means stop at that point. Defaults to RobotConfig.blend_radius
+            speeds: Optional speed in mm/s for the move to each point, overriding `speed`
+            
+        Returns:
+            0 on success, otherwise the failing set_position code (or -1)
+        """
+        if len(points) == 0:
+            return 0
+        
+        if _z is None:
+            _z = self.config.robot.z_raised if raised else self.config.robot.z_lowered
+        if radius is None:
+            radius = self.config.robot.blend_radius
+        if roll is None:
+            roll = self.config.robot.roll
+        if pitch is None:
+            pitch = self.config.robot.pitch
+        if yaw is None:
+            yaw = self.config.robot.yaw
+        
+        self._leave_resting_state()
+        
+        self.set_robot_state(RobotState.MOVING)
+        
+        # Check for errors once before streaming the stroke
+        if not self._check_and_handle_errors(f"execute_polyline of {len(points)} points"):
+            return -1
+        
+        if isinstance(radius, (int, float)):
+            radii = [radius] * len(points)
+        else:
+            radii = [r if r >= 0 else None for r in radius]
+        
+        if speeds is None:
+            speeds = [self.config.robot.get_speed(speed)] * len(points)
+        
+        last = len(points) - 1
+        retried = False
+        i = 0
+        while i <= last:
+            x, y = points[i]
+            ret = self._send_position(x=x,
+                                        y=y,
+                                        z=_z,
+                                        roll = roll,
+                                        pitch = pitch,
+                                        yaw = yaw,
+                                        radius = radii[i] if 0 < i < last else None,
+                                        speed = speeds[i],
+                                        mvacc = self.config.robot.mvacc,
+                                        wait = False
+                                        )
+            if ret != 0:
+                print(f"[ERROR] set_position failed at point {i}/{last}, code: {ret}")
+                if retried or not self._check_and_handle_errors(f"execute_polyline failed with code {ret}"):
+                    self.set_robot_state(RobotState.PAUSED)
+                    return ret
+                # Resume the stroke from the failed point once the error is handled
+                print("🔄 Resuming stroke after error recovery...")
+                retried = True
+                continue
+            i += 1
+        
+        self.set_robot_state(RobotState.PAUSED)
+        
+        # Check for errors once after the stroke has been queued
+        if not self._check_and_handle_errors(f"execute_polyline of {len(points)} points"):
+            return -1
+        return 0
+            
+    def _leave_resting_state(self):
+        """
+        Bring the robot to the centre first if its position is unknown or docked.
+        """
+        if self.get_robot_state() == RobotState.UNKNOWN:
+            self.set_robot_state(RobotState.CALCULATING)
+            self.move_centred_position()
+            
+        elif self.get_robot_state() == RobotState.DOCKED:
+            self.set_robot_state(RobotState.CALCULATING)
+            self.move_centred_position(speed=SpeedType.SLOW)
+            
+    @timed()
     def move_centred_position(self, speed: SpeedType = SpeedType.NORMAL):
         """
         Move the robot to the centre of the canvas.
@@ -234,6 +407,7 @@ class RobotService:
         self.set_robot_state(RobotState.CENTRED)
 
                 
+    @timed()
     def move_change_tool_position(self, speed: SpeedType = SpeedType.NORMAL):
         """
         Move the robot to its position to change the tool.
@@ -243,6 +417,7 @@ class RobotService:
         self.set_robot_state(RobotState.TOOL_CHANGE)
         
         
+    @timed()
     def move_docked_position(self, speed: SpeedType = SpeedType.NORMAL):
         """
         Move the robot to its hidden position, away from camera.
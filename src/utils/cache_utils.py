@@ -0,0 +1,82 @@
+"""
+Content-addressed on-disk cache with least-recently-used eviction.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class DiskCache:
+    """
+    Stores one file per key in a directory, evicting the least recently used
+    entries once the directory grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".bin"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Hash the given parts into a cache key."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the stored bytes for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store bytes for a key, then evict old entries if over the size limit."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*{self.suffix}"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counts and current size of the cache."""
+        sizes = [path.stat().st_size for path in self.directory.glob(f"*{self.suffix}")] if self.directory.exists() else []
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(sizes),
+            "bytes": sum(sizes),
+        }
@@ -40,11 +40,11 @@ def scale_image(image: NDArray[np.uint8], target_dimensions: Tuple[float, float]
 def convert_to_grayscale(image: NDArray[np.uint8]) -> NDArray[np.uint8]:
     return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-def apply_gaussian_blur(image: NDArray[np.uint8]) -> NDArray[np.uint8]:
-    return cv2.GaussianBlur(image, (5, 5), 1)
+def apply_gaussian_blur(image: NDArray[np.uint8], kernel_size: int = 5, sigma: float = 1) -> NDArray[np.uint8]:
+    return cv2.GaussianBlur(image, (kernel_size, kernel_size), sigma)
 
-def apply_canny_edge_detection(image: NDArray[np.uint8]) -> NDArray[np.uint8]:
-    return cv2.Canny(image, 50, 100)
+def apply_canny_edge_detection(image: NDArray[np.uint8], low: int = 50, high: int = 100) -> NDArray[np.uint8]:
+    return cv2.Canny(image, low, high)
 
 def binarize_drawing(image, threshold=128):
     gray = convert_to_grayscale(image)
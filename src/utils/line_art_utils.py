@@ -0,0 +1,166 @@
+"""
+Registry of line-art algorithms that turn a greyscale image into a binary line image.
+
+Each algorithm takes the greyscale image (already scaled to the canvas) and the
+ImageProcessingConfig, and returns a uint8 image where ink pixels are 255.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+import cv2
+
+from config.image_processing_config import ImageProcessingConfig
+import utils.image_utils as image_utils
+
+
+# Extra pixels of tile overlap for steps whose reach is not fixed, such as
+# thinning and Canny hysteresis
+TILE_MARGIN = 8
+
+
+@dataclass
+class LineArtAlgorithm:
+    """A registered line-art algorithm."""
+    name: str
+    convert: Callable[[NDArray[np.uint8], ImageProcessingConfig], NDArray[np.uint8]]
+    description: str
+    # Pixels of neighbourhood each output pixel mostly depends on under the
+    # given settings, used as the tile overlap; None when the algorithm looks at
+    # the whole image and cannot be converted in tiles
+    reach: Optional[Callable[[ImageProcessingConfig], int]] = None
+
+    @property
+    def tileable(self) -> bool:
+        """Whether overlapping tiles can be converted separately."""
+        return self.reach is not None
+
+
+LINE_ART_ALGORITHMS: Dict[str, LineArtAlgorithm] = {}
+
+
+def register_line_art(name: str, description: str,
+                      reach: Optional[Callable[[ImageProcessingConfig], int]] = None):
+    """Decorator adding a line-art function to the registry under `name`."""
+    def register(convert):
+        LINE_ART_ALGORITHMS[name] = LineArtAlgorithm(name, convert, description, reach)
+        return convert
+    return register
+
+
+def get_line_art(name: str) -> LineArtAlgorithm:
+    """Look up a registered line-art algorithm."""
+    if name not in LINE_ART_ALGORITHMS:
+        raise ValueError(f"Unknown line-art algorithm: {name} "
+                         f"(available: {', '.join(line_art_names())})")
+    return LINE_ART_ALGORITHMS[name]
+
+
+def line_art_names() -> List[str]:
+    """Names of every registered line-art algorithm."""
+    return list(LINE_ART_ALGORITHMS)
+
+
+def thin(mask: NDArray[np.bool_]) -> NDArray[np.bool_]:
+    """
+    Thin a binary mask to one-pixel-wide centrelines (Zhang-Suen).
+
+    Uses cv2.ximgproc.thinning when opencv-contrib is installed, otherwise a
+    vectorised implementation that removes one boundary layer per pass.
+    """
+    ximgproc = getattr(cv2, "ximgproc", None)
+    if ximgproc is not None:
+        return ximgproc.thinning(mask.astype(np.uint8) * 255) > 0
+
+    img = np.pad(mask.astype(np.uint8), 1)
+    changed = True
+    while changed:
+        changed = False
+        for step in (0, 1):
+            # Neighbours clockwise from north: P2 .. P9
+            p2, p3, p4 = img[:-2, 1:-1], img[:-2, 2:], img[1:-1, 2:]
+            p5, p6, p7 = img[2:, 2:], img[2:, 1:-1], img[2:, :-2]
+            p8, p9 = img[1:-1, :-2], img[:-2, :-2]
+            ring = [p2, p3, p4, p5, p6, p7, p8, p9, p2]
+            count = sum(ring[:-1])
+            transitions = sum((ring[k] == 0) & (ring[k + 1] == 1) for k in range(8))
+            if step == 0:
+                side = (p2 * p4 * p6 == 0) & (p4 * p6 * p8 == 0)
+            else:
+                side = (p2 * p4 * p8 == 0) & (p2 * p6 * p8 == 0)
+            remove = (img[1:-1, 1:-1] == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & side
+            if remove.any():
+                img[1:-1, 1:-1][remove] = 0
+                changed = True
+    return img[1:-1, 1:-1] > 0
+
+
+def _canny_reach(settings: ImageProcessingConfig) -> int:
+    # Blur, 3x3 Sobel gradients and non-maximum suppression. Hysteresis follows
+    # weak edges any distance, so a few edge pixels can still differ at seams.
+    return settings.blur_kernel // 2 + 2 + TILE_MARGIN
+
+
+@register_line_art("canny", "Gaussian blur and Canny edges (both sides of every line)", reach=_canny_reach)
+def canny_line_art(grey: NDArray[np.uint8], settings: ImageProcessingConfig) -> NDArray[np.uint8]:
+    blurred = image_utils.apply_gaussian_blur(grey, settings.blur_kernel, settings.blur_sigma)
+    return image_utils.apply_canny_edge_detection(blurred, settings.canny_low, settings.canny_high)
+
+
+@register_line_art("skeleton", "Otsu threshold thinned to centrelines, one stroke per drawn line")
+def skeleton_line_art(grey: NDArray[np.uint8], settings: ImageProcessingConfig) -> NDArray[np.uint8]:
+    blurred = image_utils.apply_gaussian_blur(grey, settings.blur_kernel, settings.blur_sigma)
+    _, ink = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return thin(ink > 0).astype(np.uint8) * 255
+
+
+def _adaptive_reach(settings: ImageProcessingConfig) -> int:
+    # Blur, the threshold block and the 2x2 opening; thinning is iterative but
+    # rarely reaches further than a line's half-width
+    return settings.blur_kernel // 2 + max(3, settings.adaptive_block_size | 1) // 2 + 1 + TILE_MARGIN
+
+
+@register_line_art("adaptive", "Adaptive threshold thinned to centrelines, robust to uneven shading",
+                   reach=_adaptive_reach)
+def adaptive_line_art(grey: NDArray[np.uint8], settings: ImageProcessingConfig) -> NDArray[np.uint8]:
+    blurred = image_utils.apply_gaussian_blur(grey, settings.blur_kernel, settings.blur_sigma)
+    ink = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV,
+                                max(3, settings.adaptive_block_size | 1), settings.adaptive_offset)
+    # Drop isolated specks before thinning them into stray strokes
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    return thin(ink > 0).astype(np.uint8) * 255
+
+
+def _hatch_pattern(shape, angle: float, spacing: float) -> NDArray[np.uint8]:
+    """Parallel one-pixel lines at `angle` degrees, `spacing` pixels apart, covering an image."""
+    h, w = shape
+    pattern = np.zeros((h, w), dtype=np.uint8)
+    direction = np.array([np.cos(np.radians(angle)), np.sin(np.radians(angle))])
+    normal = np.array([-direction[1], direction[0]])
+    centre = np.array([w / 2.0, h / 2.0])
+    reach = np.hypot(w, h) / 2.0
+    for offset in np.arange(-reach, reach, max(1.0, spacing)):
+        middle = centre + normal * offset
+        start = np.round(middle - direction * reach).astype(int)
+        end = np.round(middle + direction * reach).astype(int)
+        cv2.line(pattern, (int(start[0]), int(start[1])), (int(end[0]), int(end[1])), 255, 1)
+    return pattern
+
+
+@register_line_art("hatching", "Tonal hatching: darker tones get more hatch directions")
+def hatching_line_art(grey: NDArray[np.uint8], settings: ImageProcessingConfig) -> NDArray[np.uint8]:
+    # Tones are taken from a heavier blur so hatching follows areas rather than texture
+    smooth = cv2.GaussianBlur(grey, (0, 0), max(1.0, settings.hatch_spacing_mm * settings.pixels_per_mm / 2))
+    spacing = settings.hatch_spacing_mm * settings.pixels_per_mm
+    angles = (45.0, 135.0, 0.0, 90.0)
+
+    line_image = np.zeros_like(grey)
+    for tone, angle in zip(settings.hatch_tones, angles):
+        region = smooth < tone
+        if region.any():
+            line_image[region] |= _hatch_pattern(grey.shape, angle, spacing)[region]
+    if settings.hatch_outlines:
+        line_image |= skeleton_line_art(grey, settings)
+    return line_image
@@ -0,0 +1,114 @@
+"""
+Tracking of commands queued on the arm controller, with a future per stroke.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class MotionMonitor:
+    """
+    Counts commands as they are queued on the controller and compares them with
+    the controller's own queue depth (`cmd_num`) to tell which have been executed.
+
+    track() returns a Future that resolves once every command queued so far has
+    finished; a background thread polls the controller only while such futures
+    are pending. asyncio code can await them through asyncio.wrap_future().
+
+    When the controller reports an error, `recover` is called and pending
+    futures keep waiting if it clears the error; they resolve with -1 only
+    once recovery has failed.
+    """
+
+    def __init__(self, arm, max_queued_commands: int, poll_interval: float = 0.02,
+                 recover: Optional[Callable[[], bool]] = None):
+        self.arm = arm
+        self.max_queued_commands = max_queued_commands
+        self.poll_interval = poll_interval
+        self.recover = recover
+
+        self._sent = 0
+        # (commands sent when tracked, future, result to resolve it with)
+        self._pending: List[Tuple[int, Future, Any]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def queue_depth(self) -> int:
+        """Commands still waiting in the controller's queue."""
+        return int(getattr(self.arm, "cmd_num", 0) or 0)
+
+    def is_moving(self) -> bool:
+        """Whether the arm is currently executing a move."""
+        return bool(self.arm.get_is_moving())
+
+    def is_idle(self) -> bool:
+        """Whether every queued command has been executed."""
+        return self.queue_depth() == 0 and not self.is_moving()
+
+    def wait_for_space(self):
+        """Block while the controller's queue is full (back-pressure)."""
+        while self.queue_depth() >= self.max_queued_commands:
+            time.sleep(self.poll_interval)
+
+    def command_sent(self):
+        """Record that one more command has been queued."""
+        with self._lock:
+            self._sent += 1
+
+    def track(self, result: Any = 0) -> Future:
+        """
+        Future resolved with `result` once every command queued so far has finished.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self._pending.append((self._sent, future, result))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name="motion-monitor", daemon=True)
+                self._thread.start()
+        return future
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued command has finished.
+
+        Returns:
+            True once idle, False if `timeout` seconds passed first
+        """
+        try:
+            self.track().result(timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    def _poll(self):
+        """Resolve pending futures as the controller works through its queue."""
+        while True:
+            with self._lock:
+                sent = self._sent
+                if not self._pending:
+                    self._thread = None
+                    return
+
+            error = self.arm.error_code != 0
+            if error and self.recover is not None and self.recover():
+                # Recovered: carry on waiting for the commands that are left
+                continue
+            # A command has certainly finished once the one after it has left the queue
+            started = sent - self.queue_depth()
+            idle = not error and started == sent and not self.is_moving()
+
+            with self._lock:
+                waiting = []
+                for marker, future, result in self._pending:
+                    if error:
+                        future.set_result(-1)
+                    elif idle or started > marker:
+                        future.set_result(result)
+                    else:
+                        waiting.append((marker, future, result))
+                self._pending = waiting
+            if waiting:
+                time.sleep(self.poll_interval)
@@ -0,0 +1,179 @@
+from typing import Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from core.models import StrokePlan
+import utils.path_utils as path_utils
+
+
+def move_duration(distance: ArrayLike, speed: float, acceleration: float):
+    """
+    Time to travel a distance from rest to rest with a trapezoidal velocity profile.
+    Accepts a scalar or an array of distances.
+    """
+    d = np.asarray(distance, dtype=np.float64)
+    # Distance needed to reach full speed and stop again
+    ramp = speed * speed / acceleration
+    t = np.where(d >= ramp,
+                 d / speed + speed / acceleration,
+                 2.0 * np.sqrt(np.maximum(d, 0.0) / acceleration))
+    return float(t) if t.ndim == 0 else t
+
+
+def segment_duration(distance: float, speed: float, acceleration: float,
+                     entry_speed: float = 0.0, exit_speed: float = 0.0) -> float:
+    """
+    Time to travel a single segment that starts and ends at the given speeds,
+    accelerating towards `speed` and braking in time for `exit_speed`.
+    """
+    if distance <= 0.0:
+        return 0.0
+    entry_speed = min(entry_speed, speed)
+    exit_speed = min(exit_speed, speed)
+    accel_distance = (speed * speed - entry_speed * entry_speed) / (2.0 * acceleration)
+    decel_distance = (speed * speed - exit_speed * exit_speed) / (2.0 * acceleration)
+    if accel_distance + decel_distance <= distance:
+        return ((speed - entry_speed) / acceleration + (speed - exit_speed) / acceleration +
+                (distance - accel_distance - decel_distance) / speed)
+    
+    # Full speed is never reached: accelerate to a peak and brake straight away
+    peak = np.sqrt((2.0 * acceleration * distance + entry_speed ** 2 + exit_speed ** 2) / 2.0)
+    if peak < max(entry_speed, exit_speed):
+        return 2.0 * distance / (entry_speed + exit_speed)
+    return float((peak - entry_speed) / acceleration + (peak - exit_speed) / acceleration)
+
+
+def segment_durations(distance: ArrayLike, speed: ArrayLike, acceleration: float,
+                      entry_speed: ArrayLike, exit_speed: ArrayLike) -> NDArray[np.float64]:
+    """
+    Vectorised segment_duration over arrays of segments.
+    """
+    d = np.asarray(distance, dtype=np.float64)
+    v = np.asarray(speed, dtype=np.float64)
+    v0 = np.minimum(entry_speed, v)
+    v1 = np.minimum(exit_speed, v)
+    accel_distance = (v * v - v0 * v0) / (2.0 * acceleration)
+    decel_distance = (v * v - v1 * v1) / (2.0 * acceleration)
+    cruise = ((v - v0) + (v - v1)) / acceleration + (d - accel_distance - decel_distance) / v
+    
+    peak = np.sqrt((2.0 * acceleration * d + v0 ** 2 + v1 ** 2) / 2.0)
+    ramped = (2.0 * peak - v0 - v1) / acceleration
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unreachable = np.where(v0 + v1 > 0, 2.0 * d / (v0 + v1), 0.0)
+    short = np.where(peak < np.maximum(v0, v1), unreachable, ramped)
+    
+    durations = np.where(accel_distance + decel_distance <= d, cruise, short)
+    return np.where(d > 0.0, durations, 0.0)
+
+
+def estimate_drawing_time(plan: StrokePlan, scaling_factor: float,
+                          draw_speed: float, travel_speed: float, acceleration: float) -> float:
+    """
+    Estimate the time to draw a pixel-space plan, treating each stroke as one
+    blended move and each gap between strokes as one pen-up move.
+    """
+    if len(plan) == 0:
+        return 0.0
+    draw = move_duration(path_utils.stroke_lengths(plan) * scaling_factor, draw_speed, acceleration)
+    travel = move_duration(path_utils.pen_up_distances(plan) * scaling_factor, travel_speed, acceleration)
+    return float(np.sum(draw) + np.sum(travel))
+
+
+def corner_speed_limits(plan: StrokePlan, radii: ArrayLike, acceleration: float) -> NDArray[np.float64]:
+    """
+    Highest speed at which each point can be passed without stopping.
+    
+    A blend of radius r around a turn of θ follows an arc of radius
+    r / tan(θ/2), which can be taken at sqrt(acceleration * arc radius).
+    Points with a negative radius, and the first and last point of each
+    stroke (where the pen comes down and lifts), get 0.
+    """
+    limits = np.zeros(plan.num_points, dtype=np.float64)
+    if plan.num_points < 2:
+        return limits
+    points = plan.points.astype(np.float64)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (plan.num_points,))
+    
+    interior = np.ones(plan.num_points, dtype=bool)
+    interior[plan.offsets[:-1][plan.lengths > 0]] = False
+    interior[plan.offsets[1:][plan.lengths > 0] - 1] = False
+    idx = np.flatnonzero(interior)
+    
+    incoming = points[idx] - points[idx - 1]
+    outgoing = points[idx + 1] - points[idx]
+    len_in = np.linalg.norm(incoming, axis=1)
+    len_out = np.linalg.norm(outgoing, axis=1)
+    # The controller shrinks blends that would overlap the next one
+    radius = np.minimum(radii[idx], np.minimum(len_in, len_out) / 2.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_turn = np.einsum("ij,ij->i", incoming, outgoing) / (len_in * len_out)
+        turn = np.arccos(np.clip(np.nan_to_num(cos_turn, nan=1.0), -1.0, 1.0))
+        arc_radius = np.where(turn > 1e-9, radius / np.tan(turn / 2.0), np.inf)
+    limits[idx] = np.where(radius >= 0, np.sqrt(acceleration * np.maximum(arc_radius, 0.0)), 0.0)
+    return limits
+
+
+def profile_speeds(plan: StrokePlan, radii: ArrayLike, min_speed: float, max_speed: float,
+                   acceleration: float, pen_speed: float) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Choose a commanded speed for every move of a plan from its corners and lengths.
+    
+    Corner limits are propagated backwards (so the arm can brake in time for a
+    tight turn) and forwards (so it can only carry the speed it has reached).
+    Each move is then commanded at the peak speed it can reach between its two
+    corners, clipped to [min_speed, max_speed]: long straight runs go fast,
+    short moves around tight turns go slow.
+    
+    Returns:
+        Tuple of (speeds, corner_speeds) per point, where speeds[k] is the
+        commanded speed of the move ending at point k; the first point of a
+        stroke is reached by lowering the pen, which always runs at `pen_speed`
+    """
+    n = plan.num_points
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    points = plan.points.astype(np.float64)
+    move_lengths = np.zeros(n, dtype=np.float64)
+    move_lengths[1:] = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    
+    two_a = 2.0 * acceleration
+    # Squared corner speeds, propagated with v² <= v_next² + 2·a·d. Along the
+    # cumulative distance D both passes become running minima:
+    #   backward: w[k] = min over j >= k of (w[j] + 2a·D[j]) - 2a·D[k]
+    #   forward:  w[k] = min over j <= k of (w[j] - 2a·D[j]) + 2a·D[k]
+    # A jump in D between strokes larger than any w / 2a keeps strokes apart.
+    corner_sq = np.minimum(corner_speed_limits(plan, radii, acceleration), max_speed) ** 2
+    steps = move_lengths.copy()
+    steps[plan.offsets[1:-1][plan.offsets[1:-1] < n]] = max_speed ** 2 / two_a + 1.0
+    distance = two_a * np.cumsum(steps)
+    corner_sq = np.minimum(corner_sq, np.minimum.accumulate((corner_sq + distance)[::-1])[::-1] - distance)
+    corner_sq = np.minimum(corner_sq, np.minimum.accumulate(corner_sq - distance) + distance)
+    corner = np.sqrt(np.maximum(corner_sq, 0.0))
+    
+    previous = np.concatenate(([0.0], corner[:-1]))
+    peak = np.sqrt((two_a * move_lengths + previous ** 2 + corner ** 2) / 2.0)
+    speeds = np.clip(peak, min_speed, max_speed)
+    
+    speeds[plan.offsets[:-1][plan.lengths > 0]] = pen_speed
+    return speeds, corner
+
+
+def profiled_duration(plan: StrokePlan, speeds: ArrayLike, corner_speeds: ArrayLike, acceleration: float) -> float:
+    """
+    Time to draw every stroke of a plan with speeds from profile_speeds,
+    passing each point at its corner speed.
+    """
+    n = plan.num_points
+    if n < 2:
+        return 0.0
+    points = plan.points.astype(np.float64)
+    move_lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    speeds = np.asarray(speeds, dtype=np.float64)[1:]
+    corner = np.asarray(corner_speeds, dtype=np.float64)
+    
+    # Moves between strokes are pen-up travel, timed elsewhere
+    in_stroke = np.ones(n - 1, dtype=bool)
+    in_stroke[plan.offsets[1:-1][(plan.offsets[1:-1] > 0) & (plan.offsets[1:-1] < n)] - 1] = False
+    return float(np.sum(segment_durations(move_lengths[in_stroke], speeds[in_stroke], acceleration,
+                                          corner[:-1][in_stroke], corner[1:][in_stroke])))
@@ -0,0 +1,445 @@
+import numpy as np
+import cv2
+from numpy.typing import ArrayLike, NDArray
+from typing import Optional, Tuple
+
+from scipy.spatial import cKDTree
+
+from core.models import StrokePlan
+
+
+def compute_scaling_factor(image_shape: Tuple[int, ...], canvas_dimensions: Tuple[float, float]) -> float:
+    """
+    Get the pixel to millimetre scaling factor that fits an image on the canvas.
+    """
+    canvas_width, canvas_height = canvas_dimensions
+    drawing_height, drawing_width = image_shape[:2]
+
+    scale_x = canvas_width / drawing_width
+    scale_y = canvas_height / drawing_height
+    return min(scale_x, scale_y)
+
+
+def pixel_to_robot_affine(scaling_factor: float, canvas_to_robot: ArrayLike) -> NDArray[np.float64]:
+    """
+    Compose pixel -> canvas millimetre scaling with a 2x3 canvas -> robot affine.
+    """
+    affine = np.asarray(canvas_to_robot, dtype=np.float64).reshape(2, 3).copy()
+    affine[:, :2] *= scaling_factor
+    return affine
+
+
+def apply_affine(points: ArrayLike, affine: NDArray[np.float64]) -> NDArray[np.float64]:
+    """
+    Apply a 2x3 affine to an (n, 2) array of (x, y) points.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return pts @ affine[:, :2].T + affine[:, 2]
+
+
+def simplify_plan(plan: StrokePlan, tolerance: float) -> StrokePlan:
+    """
+    Simplify every stroke with Ramer-Douglas-Peucker so that no dropped point is
+    more than `tolerance` away from the kept polyline. Points keep the plan's units.
+    """
+    if plan.num_points == 0:
+        return plan
+    # approxPolyDP takes float32 points, which is ample precision for millimetres
+    points = plan.points.astype(np.float32)
+    strokes = []
+    for stroke in StrokePlan(points, plan.offsets):
+        if len(stroke) < 3:
+            strokes.append(stroke)
+            continue
+        strokes.append(cv2.approxPolyDP(stroke.reshape(-1, 1, 2), epsilon=tolerance, closed=False).reshape(-1, 2))
+    return StrokePlan.from_segments(strokes, dtype=plan.points.dtype)
+
+
+def blend_radii(plan: StrokePlan, tolerance: float, max_radius: float) -> NDArray[np.float64]:
+    """
+    Largest blend radius for every point so that the arc rounding the corner
+    stays within `tolerance` of the vertex and neighbouring blends do not overlap.
+    
+    A blend starting `r` before a corner that turns by θ deviates from the
+    vertex by r·tan(θ/4), so r = tolerance / tan(θ/4), limited to half the
+    shorter adjoining segment and to `max_radius`. The first and last points of
+    each stroke get -1 (no blending) as the pen comes down and lifts there.
+    """
+    radii = np.full(plan.num_points, -1.0)
+    if plan.num_points < 2:
+        return radii
+    points = plan.points.astype(np.float64)
+    
+    interior = np.ones(plan.num_points, dtype=bool)
+    interior[plan.offsets[:-1][plan.lengths > 0]] = False
+    interior[plan.offsets[1:][plan.lengths > 0] - 1] = False
+    idx = np.flatnonzero(interior)
+    
+    incoming = points[idx] - points[idx - 1]
+    outgoing = points[idx + 1] - points[idx]
+    len_in = np.linalg.norm(incoming, axis=1)
+    len_out = np.linalg.norm(outgoing, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_turn = np.einsum("ij,ij->i", incoming, outgoing) / (len_in * len_out)
+        turn = np.arccos(np.clip(np.nan_to_num(cos_turn, nan=1.0), -1.0, 1.0))
+        by_tolerance = tolerance / np.tan(turn / 4.0)
+    radii[idx] = np.minimum(np.minimum(by_tolerance, np.minimum(len_in, len_out) / 2.0), max_radius)
+    return radii
+
+
+def stroke_lengths(plan: StrokePlan) -> NDArray[np.float64]:
+    """
+    Length of each stroke along its points.
+    """
+    if plan.num_points == 0:
+        return np.zeros(len(plan), dtype=np.float64)
+    steps = np.linalg.norm(np.diff(plan.points.astype(np.float64), axis=0), axis=1)
+    # Steps from the end of one stroke to the start of the next are pen-up travel
+    boundaries = plan.offsets[1:-1] - 1
+    steps[boundaries[(boundaries >= 0) & (boundaries < len(steps))]] = 0.0
+    travelled = np.concatenate(([0.0], np.cumsum(steps)))
+    
+    lengths = np.zeros(len(plan), dtype=np.float64)
+    non_empty = plan.lengths > 0
+    lengths[non_empty] = travelled[plan.offsets[1:][non_empty] - 1] - travelled[plan.offsets[:-1][non_empty]]
+    return lengths
+
+
+def pen_up_distances(plan: StrokePlan) -> NDArray[np.float64]:
+    """
+    Travel between the end of each stroke and the start of the next.
+    """
+    if len(plan) < 2:
+        return np.zeros(0, dtype=np.float64)
+    starts = plan.starts.astype(np.float64)
+    ends = plan.ends.astype(np.float64)
+    return np.linalg.norm(starts[1:] - ends[:-1], axis=1)
+
+
+def pen_up_distance(plan: StrokePlan) -> float:
+    """
+    Total travel between the end of each stroke and the start of the next.
+    """
+    return float(pen_up_distances(plan).sum())
+
+
+def stitch_strokes(plan: StrokePlan, groups: ArrayLike, max_gap: float = 1.5) -> StrokePlan:
+    """
+    Join strokes from different groups (e.g. image tiles) whose endpoints are
+    within `max_gap` of each other, so lines cut at a tile seam become one
+    stroke again. Each endpoint is joined at most once, closest pairs first.
+    """
+    n = len(plan)
+    if n < 2:
+        return plan
+    groups = np.asarray(groups)
+    endpoints = np.empty((2 * n, 2), dtype=np.float64)
+    endpoints[0::2] = plan.starts
+    endpoints[1::2] = plan.ends
+
+    pairs = cKDTree(endpoints).query_pairs(max_gap, output_type="ndarray")
+    pairs = pairs[groups[pairs[:, 0] // 2] != groups[pairs[:, 1] // 2]]
+    if len(pairs) == 0:
+        return plan
+    gaps = np.linalg.norm(endpoints[pairs[:, 0]] - endpoints[pairs[:, 1]], axis=1)
+
+    # Endpoint 2i is the start of stroke i, 2i + 1 is its end.
+    link = [-1] * (2 * n)
+    for a, b in pairs[np.argsort(gaps, kind="stable")].tolist():
+        if link[a] < 0 and link[b] < 0:
+            link[a], link[b] = b, a
+
+    visited = bytearray(n)
+    order, flipped, join = [], [], []
+
+    def follow(stroke: int, flip: bool):
+        # Walk a chain of linked strokes, leaving each by its other endpoint
+        while True:
+            visited[stroke] = 1
+            order.append(stroke)
+            flipped.append(flip)
+            partner = link[2 * stroke + (0 if flip else 1)]
+            if partner < 0 or visited[partner // 2]:
+                join.append(False)
+                return
+            join.append(True)
+            stroke, flip = partner // 2, partner % 2 == 1
+
+    # Chains start at a stroke with a free endpoint; whatever is left forms closed loops
+    for stroke in range(n):
+        if not visited[stroke] and link[2 * stroke] < 0:
+            follow(stroke, False)
+        elif not visited[stroke] and link[2 * stroke + 1] < 0:
+            follow(stroke, True)
+    for stroke in range(n):
+        if not visited[stroke]:
+            follow(stroke, False)
+
+    return plan.reordered(order, flipped).joined(join[:-1])
+
+
+def nearest_stroke(starts: NDArray, ends: NDArray, point: ArrayLike) -> Tuple[int, bool]:
+    """
+    Stroke with the endpoint nearest to `point`, and whether that endpoint is its end.
+    """
+    point = np.asarray(point, dtype=np.float64)
+    to_start = np.sum((starts - point) ** 2, axis=1)
+    to_end = np.sum((ends - point) ** 2, axis=1)
+    index = int(np.argmin(np.minimum(to_start, to_end)))
+    return index, bool(to_end[index] < to_start[index])
+
+
+def order_strokes_greedy(starts: NDArray[np.float64], ends: NDArray[np.float64],
+                         origin: Optional[ArrayLike] = None) -> Tuple[NDArray[np.int64], NDArray[np.bool_]]:
+    """
+    Order strokes by repeatedly travelling to the nearest free endpoint,
+    beginning at stroke 0 or, when given, the endpoint nearest to `origin`.
+
+    Returns:
+        Tuple of (order, flipped) where flipped marks strokes drawn end to start
+    """
+    n = len(starts)
+    order = np.zeros(n, dtype=np.int64)
+    flipped = np.zeros(n, dtype=bool)
+    if n == 0:
+        return order, flipped
+
+    # Endpoint 2i is the start of stroke i, 2i + 1 is its end.
+    endpoints = np.empty((2 * n, 2), dtype=np.float64)
+    endpoints[0::2] = starts
+    endpoints[1::2] = ends
+    tree = cKDTree(endpoints)
+    # Endpoint numbers of the points in the current tree
+    tree_ids = np.arange(2 * n)
+
+    used = np.zeros(n, dtype=bool)
+    if origin is not None:
+        _, nearest = tree.query(np.asarray(origin, dtype=np.float64))
+        order[0] = nearest // 2
+        flipped[0] = nearest % 2 == 1
+    used[order[0]] = True
+    current = starts[order[0]] if flipped[0] else ends[order[0]]
+
+    for step in range(1, n):
+        # Once most endpoints in the tree are used, rebuild it from the free
+        # ones so queries do not have to wade through used neighbours.
+        if 2 * (n - step) < len(tree_ids) // 2:
+            tree_ids = np.flatnonzero(~used.repeat(2))
+            tree = cKDTree(endpoints[tree_ids])
+        size = len(tree_ids)
+        k = min(8, size)
+        while True:
+            _, idx = tree.query(current, k=k)
+            idx = tree_ids[np.atleast_1d(idx)]
+            free = idx[~used[idx // 2]]
+            if len(free) or k == size:
+                break
+            k = min(2 * k, size)
+        nearest = int(free[0])
+        stroke = nearest // 2
+        used[stroke] = True
+        order[step] = stroke
+        flipped[step] = nearest % 2 == 1
+        current = starts[stroke] if flipped[step] else ends[stroke]
+
+    return order, flipped
+
+
+def _best_two_opt_moves(S: NDArray[np.float64], E: NDArray[np.float64], rows: NDArray[np.int64],
+                        candidates: NDArray[np.int64], window: int,
+                        origin: Optional[NDArray[np.float64]]) -> Tuple[NDArray[np.float64], NDArray[np.int64]]:
+    """
+    Best 2-opt move for every position in `rows`: reversing the run i..j for
+    each j in its row of `candidates` (-1 for none, plus the whole tail).
+
+    Returns:
+        Tuple of (delta, j) per row, where delta is the change in travel
+    """
+    n = len(S)
+    i = rows[:, None]
+    j = np.concatenate((candidates, np.full((len(rows), 1), n - 1)), axis=1)
+    valid = (j >= i) & (j < i + window)
+    j = np.where(valid, j, i)
+
+    previous_end = E[np.maximum(rows - 1, 0)]
+    has_previous = rows > 0
+    if origin is not None:
+        previous_end[rows == 0] = origin
+        has_previous[:] = True
+    S_i = S[rows]
+    E_j = E[j]
+    S_next = S[np.minimum(j + 1, n - 1)]
+    has_next = j < n - 1
+
+    old = np.where(has_previous, np.linalg.norm(previous_end - S_i, axis=1), 0.0)[:, None]
+    new = np.where(has_previous[:, None], np.linalg.norm(previous_end[:, None] - E_j, axis=2), 0.0)
+    old = old + np.where(has_next, np.linalg.norm(E_j - S_next, axis=2), 0.0)
+    new = new + np.where(has_next, np.linalg.norm(S_i[:, None] - S_next, axis=2), 0.0)
+
+    delta = np.where(valid, new - old, np.inf)
+    best = np.argmin(delta, axis=1)
+    picked = np.arange(len(rows))
+    return delta[picked, best], j[picked, best]
+
+
+def two_opt_strokes(starts: NDArray[np.float64], ends: NDArray[np.float64],
+                    max_passes: int = 3, window: int = 1000,
+                    origin: Optional[ArrayLike] = None, neighbours: int = 16,
+                    min_gain: float = 1e-3) -> Tuple[NDArray[np.int64], NDArray[np.bool_]]:
+    """
+    Improve a stroke order with 2-opt moves, reversing strokes within each move.
+
+    Strokes are taken in the given order. Reversing the run i..j swaps the
+    direction of every stroke in it, so only the two edges at its ends change.
+    When `origin` is given, the travel from it to the first stroke counts too.
+
+    Only runs whose reversal creates an edge to one of the `neighbours`
+    nearest endpoints (and reversing the whole tail) are tried, with j at most
+    `window` strokes after i. Moves are searched for every stroke at once and
+    the best non-overlapping ones applied together; later rounds of a pass
+    only revisit strokes next to a changed edge. Passes stop once one shortens
+    the travel by less than `min_gain` of it.
+
+    Returns:
+        Tuple of (order, flipped) relative to the given strokes
+    """
+    S = starts.astype(np.float64).copy()
+    E = ends.astype(np.float64).copy()
+    n = len(S)
+    order = np.arange(n)
+    flipped = np.zeros(n, dtype=bool)
+    if n < 2:
+        return order, flipped
+
+    # Endpoint 2s is the start of stroke s, 2s + 1 is its end.
+    endpoints = np.empty((2 * n, 2), dtype=np.float64)
+    endpoints[0::2] = S
+    endpoints[1::2] = E
+    tree = cKDTree(endpoints)
+    k = min(neighbours + 1, 2 * n)
+    nearest = tree.query(endpoints, k=k)[1].reshape(2 * n, k)
+    first_nearest = np.full(k, -1)
+    if origin is not None:
+        origin = np.asarray(origin, dtype=np.float64)
+        first_nearest = np.atleast_1d(tree.query(origin, k=k)[1])
+    position = np.arange(n)
+
+    def travel() -> float:
+        total = float(np.linalg.norm(S[1:] - E[:-1], axis=1).sum())
+        return total + (float(np.linalg.norm(S[0] - origin)) if origin is not None else 0.0)
+
+    for _ in range(max_passes):
+        length = travel()
+        rows = np.arange(n)
+        while len(rows):
+            start_ids = 2 * order + flipped
+            end_ids = 2 * order + ~flipped
+            # j where the end of stroke j is near the end before i ...
+            near_end = np.where((rows > 0)[:, None], nearest[end_ids[np.maximum(rows - 1, 0)]], first_nearest)
+            j_end = position[near_end // 2]
+            j_end = np.where((near_end >= 0) & ((near_end % 2 == 1) != flipped[j_end]), j_end, -1)
+            # ... or where the start of stroke j + 1 is near the start of i
+            near_start = nearest[start_ids[rows]]
+            j_start = position[near_start // 2]
+            j_start = np.where((near_start % 2 == 0) != flipped[j_start], j_start - 1, -1)
+
+            delta, best = _best_two_opt_moves(S, E, rows, np.concatenate((j_end, j_start), axis=1), window, origin)
+            improving = np.flatnonzero(delta < -1e-9)
+            improving = improving[np.argsort(delta[improving])]
+
+            # Apply the best moves whose runs (with the strokes either side) do not overlap
+            taken = np.zeros(n + 2, dtype=bool)
+            changed = []
+            for m in improving.tolist():
+                i, jj = int(rows[m]), int(best[m]) + 1
+                if taken[i:jj + 2].any():
+                    continue
+                taken[i:jj + 2] = True
+                S[i:jj], E[i:jj] = E[i:jj][::-1].copy(), S[i:jj][::-1].copy()
+                order[i:jj] = order[i:jj][::-1].copy()
+                flipped[i:jj] = ~flipped[i:jj][::-1]
+                position[order[i:jj]] = np.arange(i, jj)
+                changed.extend((i - 1, i, jj - 1, jj))
+            if not changed:
+                break
+
+            # Revisit strokes that touch, or have a neighbour touching, a changed edge
+            changed = np.array(changed)
+            touched = np.zeros(n, dtype=bool)
+            touched[order[changed[(changed >= 0) & (changed < n)]]] = True
+            start_ids = 2 * order + flipped
+            end_ids = 2 * order + ~flipped
+            revisit = touched[order] | touched[nearest[start_ids] // 2].any(axis=1)
+            revisit[1:] |= touched[order[:-1]] | touched[nearest[end_ids[:-1]] // 2].any(axis=1)
+            rows = np.flatnonzero(revisit)
+        if length - travel() <= min_gain * length:
+            break
+
+    return order, flipped
+
+    # Endpoint 2s is the start of stroke s, 2s + 1 is its end.
+    endpoints = np.empty((2 * n, 2), dtype=np.float64)
+    endpoints[0::2] = S
+    endpoints[1::2] = E
+    tree = cKDTree(endpoints)
+    k = min(neighbours + 1, 2 * n)
+    _, nearest = tree.query(endpoints, k=k)
+    nearest = nearest.reshape(2 * n, k)
+    origin_nearest = None
+    if origin is not None:
+        origin = np.asarray(origin, dtype=np.float64)
+        _, origin_nearest = tree.query(origin, k=k)
+        origin_nearest = np.atleast_1d(origin_nearest)
+    position = np.arange(n)
+
+    def travel() -> float:
+        total = float(np.linalg.norm(S[1:] - E[:-1], axis=1).sum())
+        return total + (float(np.linalg.norm(S[0] - origin)) if origin is not None else 0.0)
+
+    length = travel()
+    for _ in range(max_passes):
+        gain = 0.0
+        for i in range(n):
+            # Runs i..j whose reversal joins the previous end to E[j] ...
+            if i > 0:
+                candidates = nearest[2 * order[i - 1] + (0 if flipped[i - 1] else 1)]
+            elif origin_nearest is not None:
+                candidates = origin_nearest
+            else:
+                candidates = np.zeros(0, dtype=np.int64)
+            j = position[candidates // 2]
+            to_end = j[(candidates % 2 == 1) != flipped[j]]
+            # ... or S[i] to S[j + 1], plus reversing the whole tail
+            candidates = nearest[2 * order[i] + (1 if flipped[i] else 0)]
+            j = position[candidates // 2]
+            to_start = j[(candidates % 2 == 0) != flipped[j]] - 1
+            j = np.unique(np.concatenate((to_end, to_start, [n - 1])))
+            j = j[(j >= i) & (j < i + window)]
+            if len(j) == 0:
+                continue
+
+            old = np.zeros(len(j))
+            new = np.zeros(len(j))
+            previous_end = E[i - 1] if i > 0 else origin
+            if previous_end is not None:
+                old += np.linalg.norm(previous_end - S[i])
+                new += np.linalg.norm(previous_end - E[j], axis=1)
+            has_next = j < n - 1
+            jn = j[has_next]
+            old[has_next] += np.linalg.norm(E[jn] - S[jn + 1], axis=1)
+            new[has_next] += np.linalg.norm(S[i] - S[jn + 1], axis=1)
+
+            delta = new - old
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                jj = int(j[best]) + 1
+                S[i:jj], E[i:jj] = E[i:jj][::-1].copy(), S[i:jj][::-1].copy()
+                order[i:jj] = order[i:jj][::-1].copy()
+                flipped[i:jj] = ~flipped[i:jj][::-1]
+                position[order[i:jj]] = np.arange(i, jj)
+                gain -= delta[best]
+        if gain <= min_gain * length:
+            break
+        length -= gain
+
+    return order, flipped
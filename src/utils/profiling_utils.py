@@ -0,0 +1,173 @@
+"""
+Lightweight timing instrumentation for the drawing pipeline.
+
+Spans nest per thread, so timing a service method inside a DrawingTools command
+records it as a child of that command. Selected spans can also be run under
+cProfile, with the stats written to disk.
+"""
+
+import cProfile
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class Span:
+    """A timed region, with the spans started inside it as children."""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.parent = parent
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.profile_path: Optional[str] = None
+
+
+class Profiler:
+    """
+    Records nested timing spans and renders a summary tree.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.cprofile_stages = set()
+        self.cprofile_dir = "profiles"
+        self.roots: List[Span] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, cprofile_stages=(), cprofile_dir: str = "profiles"):
+        """Apply instrumentation settings."""
+        self.enabled = enabled
+        self.cprofile_stages = set(cprofile_stages)
+        self.cprofile_dir = cprofile_dir
+
+    def reset(self):
+        """Forget all recorded spans."""
+        with self._lock:
+            self.roots = []
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.cprofile_active = False
+        return self._local.stack
+
+    def _wants_cprofile(self, name: str, is_root: bool) -> bool:
+        if self._local.cprofile_active:
+            return False
+        return name in self.cprofile_stages or ("*" in self.cprofile_stages and is_root)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block as a span named `name`."""
+        if not self.enabled:
+            yield None
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent)
+        if parent is None:
+            with self._lock:
+                self.roots.append(span)
+        else:
+            parent.children.append(span)
+
+        profile = None
+        if self._wants_cprofile(name, parent is None):
+            profile = cProfile.Profile()
+            self._local.cprofile_active = True
+            profile.enable()
+
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            span.duration = time.perf_counter() - span.start
+            if profile is not None:
+                profile.disable()
+                self._local.cprofile_active = False
+                span.profile_path = self._dump_profile(profile, name)
+
+    def _dump_profile(self, profile: cProfile.Profile, name: str) -> str:
+        Path(self.cprofile_dir).mkdir(parents=True, exist_ok=True)
+        filename = Path(self.cprofile_dir) / f"{name}_{datetime.now():%Y%m%d_%H%M%S_%f}.prof"
+        profile.dump_stats(str(filename))
+        return str(filename)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator timing every call of a function as a span."""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self) -> str:
+        """Render recorded spans as an indented tree, merging repeated children."""
+        with self._lock:
+            roots = list(self.roots)
+        if not roots:
+            return "No timings recorded"
+
+        lines = ["⏱️  Timing summary:"]
+        self._render(roots, 1, None, lines)
+        return "\n".join(lines)
+
+    def _render(self, spans: List[Span], depth: int, parent_duration: Optional[float], lines: List[str]):
+        groups: Dict[str, List[Span]] = {}
+        for span in spans:
+            groups.setdefault(span.name, []).append(span)
+
+        for name, group in groups.items():
+            total = sum(span.duration for span in group)
+            label = name if len(group) == 1 else f"{name} ×{len(group)}"
+            line = f"{'  ' * depth}{label:<{60 - 2 * depth}} {total:9.3f} s"
+            if parent_duration:
+                line += f" {100 * total / parent_duration:6.1f}%"
+            lines.append(line)
+            for span in group:
+                if span.profile_path:
+                    lines.append(f"{'  ' * (depth + 1)}cProfile stats: {span.profile_path}")
+            children = [child for span in group for child in span.children]
+            if children:
+                self._render(children, depth + 1, total, lines)
+
+
+profiler = Profiler()
+
+
+def configure(profiling_config) -> None:
+    """Apply a ProfilingConfig to the shared profiler."""
+    profiler.configure(profiling_config.enabled, profiling_config.cprofile_stages, profiling_config.cprofile_dir)
+
+
+def span(name: str):
+    """Time a block on the shared profiler."""
+    return profiler.span(name)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Time a function on the shared profiler."""
+    return profiler.timed(name)
+
+
+def reset() -> None:
+    """Clear the shared profiler."""
+    profiler.reset()
+
+
+def summary() -> str:
+    """Summary of the shared profiler."""
+    return profiler.summary()
@@ -0,0 +1,229 @@
+"""
+Offline stand-in for the xArm SDK used to time and test the drawing pipeline
+without hardware.
+"""
+
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config.robot_config import RobotConfig
+from utils.motion_utils import segment_duration
+from utils.robot_error_handler import XArmErrorHandler
+
+
+class SimulatedXArm:
+    """
+    Simulated xArm exposing the subset of XArmAPI used by RobotService.
+    
+    Cartesian moves follow a trapezoidal speed profile limited by `speed` and
+    `mvacc`, and every command adds a fixed latency. Blended moves (radius >= 0)
+    carry their speed into the next move, up to what the blend arc allows: a
+    blend of radius r around a turn of θ follows an arc of radius r / tan(θ/2),
+    which can be taken at sqrt(mvacc * arc radius). A blended move is only timed
+    once the next command shows the corner. Execution time is accumulated in
+    `simulated_time` instead of being slept.
+    
+    With `realtime`, commands are also laid out on the wall clock (sped up by
+    `realtime_speedup`) so `cmd_num` and get_is_moving() report a draining
+    queue and `wait=True` blocks, as on the real controller. Otherwise every
+    command completes as soon as it is sent.
+    """
+    # Code returned by set_position while a controller error is uncleared
+    HAS_ERROR = 1
+    
+    def __init__(self, robot_config: RobotConfig, command_latency: float = 0.002,
+                 realtime: bool = False, realtime_speedup: float = 1.0):
+        self.command_latency = command_latency
+        self.realtime = realtime
+        self.realtime_speedup = realtime_speedup
+        self.error_code = 0
+        self.warn_code = 0
+        self.state = 4
+        self.motion_enabled = False
+        
+        self.position = [
+            float(robot_config.centred_position["x"]),
+            float(robot_config.centred_position["y"]),
+            float(robot_config.z_raised),
+            robot_config.roll,
+            robot_config.pitch,
+            robot_config.yaw,
+        ]
+        self.speed = robot_config.speed
+        self.mvacc = robot_config.mvacc
+        
+        self._carried_speed = 0.0
+        # Blended move waiting for the next command to know its exit speed
+        self._pending_move: Optional[dict] = None
+        self._pending_errors: List[Tuple[int, int]] = []
+        self.reset_stats()
+        
+    def reset_stats(self):
+        """Reset the accumulated simulation statistics."""
+        self._finish_pending_move(0.0)
+        self._elapsed_time = 0.0
+        self.command_count = 0
+        self.travel_distance = 0.0
+        # Wall-clock anchor of simulated time zero, and simulated time spent idle
+        self._clock_start = time.monotonic()
+        self._idle_time = 0.0
+        # Wall-clock completion time of each queued command (realtime only)
+        self._completions = deque()
+        
+    @property
+    def simulated_time(self) -> float:
+        """Simulated execution time, with any blended move still queued brought to rest."""
+        elapsed = self._elapsed_time
+        if self._pending_move is not None:
+            move = self._pending_move
+            elapsed += segment_duration(move["distance"], move["speed"], move["mvacc"], entry_speed=move["entry_speed"])
+        return elapsed
+        
+    @property
+    def cmd_num(self) -> int:
+        """Commands queued on the controller and not yet finished."""
+        now = time.monotonic()
+        while self._completions and self._completions[0] <= now:
+            self._completions.popleft()
+        return len(self._completions)
+        
+    def get_is_moving(self) -> bool:
+        return bool(self._completions) and self._completions[-1] > time.monotonic()
+        
+    def _wall_clock(self, simulated: float) -> float:
+        """Wall-clock time at which the arm reaches a point of simulated time."""
+        return self._clock_start + (self._idle_time + simulated) / self.realtime_speedup
+        
+    def _catch_up_clock(self):
+        """Let simulated time stand idle until now if the queue has drained."""
+        now = (time.monotonic() - self._clock_start) * self.realtime_speedup
+        busy_until = self._idle_time + self.simulated_time
+        if now > busy_until:
+            self._idle_time += now - busy_until
+        
+    def _finish_pending_move(self, exit_speed: float):
+        """Time the queued blended move now that its exit speed is known."""
+        move = self._pending_move
+        if move is None:
+            return
+        self._pending_move = None
+        # A blended move can only carry the speed it actually reached
+        exit_speed = min(exit_speed, move["speed"],
+                         float(np.sqrt(move["entry_speed"] ** 2 + 2.0 * move["mvacc"] * move["distance"])))
+        self._elapsed_time += segment_duration(move["distance"], move["speed"], move["mvacc"],
+                                               entry_speed=move["entry_speed"], exit_speed=exit_speed)
+        self._carried_speed = exit_speed
+        
+    def _corner_speed(self, move: dict, direction: np.ndarray, distance: float) -> float:
+        """Highest speed at which the queued move can blend into a move along `direction`."""
+        radius = min(move["radius"], move["distance"] / 2.0, distance / 2.0)
+        cos_turn = float(np.clip(np.dot(move["direction"], direction), -1.0, 1.0))
+        turn = np.arccos(cos_turn)
+        if turn < 1e-9:
+            return move["speed"]
+        arc_radius = radius / np.tan(turn / 2.0)
+        return float(np.sqrt(move["mvacc"] * arc_radius))
+        
+    def inject_error(self, error_code: int, after_commands: int = 0):
+        """
+        Raise a controller error once `after_commands` further commands have been sent.
+        """
+        if error_code not in XArmErrorHandler.CONTROLLER_ERROR_CODES:
+            raise ValueError(f"Unknown controller error code: {error_code}")
+        self._pending_errors.append((after_commands, error_code))
+        
+    def _tick_errors(self):
+        """Count down injected errors and raise any that are due."""
+        pending = []
+        for remaining, code in self._pending_errors:
+            if remaining <= 0:
+                self.error_code = code
+                self._finish_pending_move(0.0)
+                self._carried_speed = 0.0
+                # The controller drops its queue on an error
+                self._completions.clear()
+            else:
+                pending.append((remaining - 1, code))
+        self._pending_errors = pending
+        
+    def clean_warn(self):
+        self.warn_code = 0
+        return 0
+        
+    def clean_error(self):
+        self.error_code = 0
+        return 0
+        
+    def motion_enable(self, enable: bool = True):
+        self.motion_enabled = enable
+        return 0
+        
+    def set_state(self, state: int = 0):
+        self.state = state
+        return 0
+        
+    def get_position(self, is_radian: Optional[bool] = None):
+        return 0, list(self.position)
+        
+    def disconnect(self):
+        pass
+        
+    def set_position(self, x=None, y=None, z=None, roll=None, pitch=None, yaw=None,
+                     radius=None, speed=None, mvacc=None, mvtime=None, relative=False,
+                     is_radian=None, wait=False, timeout=None, **kwargs) -> int:
+        """
+        Simulate a linear (or blended, when radius >= 0) Cartesian move.
+        """
+        if self.realtime:
+            self._catch_up_clock()
+        self.command_count += 1
+        self._elapsed_time += self.command_latency
+        self._tick_errors()
+        
+        if self.error_code != 0:
+            return self.HAS_ERROR
+        
+        if speed is not None:
+            self.speed = speed
+        if mvacc is not None:
+            self.mvacc = mvacc
+        
+        target = list(self.position)
+        for axis, value in enumerate((x, y, z, roll, pitch, yaw)):
+            if value is not None:
+                target[axis] = target[axis] + value if relative else float(value)
+        
+        delta = np.subtract(target[:3], self.position[:3])
+        distance = float(np.linalg.norm(delta))
+        if distance == 0.0:
+            if radius is None or radius < 0:
+                self._finish_pending_move(0.0)
+            self.position = target
+            return 0
+        direction = delta / distance
+        
+        if self._pending_move is not None:
+            corner_speed = self._corner_speed(self._pending_move, direction, distance)
+            self._finish_pending_move(min(corner_speed, self.speed))
+        
+        move = {"distance": distance, "speed": self.speed, "mvacc": self.mvacc,
+                "entry_speed": min(self._carried_speed, self.speed), "direction": direction}
+        self._carried_speed = 0.0
+        if radius is not None and radius >= 0:
+            move["radius"] = float(radius)
+            self._pending_move = move
+        else:
+            self._elapsed_time += segment_duration(distance, move["speed"], move["mvacc"],
+                                                   entry_speed=move["entry_speed"])
+        self.travel_distance += distance
+        self.position = target
+        
+        if self.realtime:
+            finish = self._wall_clock(self.simulated_time)
+            self._completions.append(finish)
+            if wait:
+                time.sleep(max(0.0, finish - time.monotonic()))
+        return 0
@@ -0,0 +1,40 @@
+"""
+Splitting large images into tiles and processing them on a pool of worker processes.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Sequence, Tuple
+
+from config.image_processing_config import ImageProcessingConfig
+
+
+def tile_workers(settings: ImageProcessingConfig, shape: Tuple[int, ...]) -> int:
+    """
+    Number of worker processes to use for an image of `shape`, or 1 when it should not be tiled.
+    """
+    if not settings.tiled_extraction or shape[0] * shape[1] < settings.tile_min_pixels:
+        return 1
+    return max(1, settings.tile_workers or os.cpu_count() or 1)
+
+
+def tile_bounds(height: int, width: int, tile_size: int) -> List[Tuple[int, int, int, int]]:
+    """
+    (top, bottom, left, right) of the tiles covering an image, row by row.
+    """
+    tile_size = max(1, tile_size)
+    return [(top, min(top + tile_size, height), left, min(left + tile_size, width))
+            for top in range(0, height, tile_size)
+            for left in range(0, width, tile_size)]
+
+
+def map_tiles(func: Callable, tasks: Sequence[tuple], workers: int) -> list:
+    """
+    Call `func(*task)` for every task, on a process pool when `workers` > 1.
+
+    `func` must be a module-level function so it can be sent to the workers.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(func, *zip(*tasks)))
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Make the project packages importable the same way main.py does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'src'))
@@ -0,0 +1,69 @@
+"""
+Parity checks between the labelled and dfs contour extraction backends.
+"""
+
+import numpy as np
+import cv2
+import pytest
+
+from config.config import Config
+from core.models import StrokePlan
+from services.path_planning_service import PathPlanningService
+
+
+@pytest.fixture
+def line_image() -> np.ndarray:
+    """Canny edges of a few overlapping shapes and a polyline."""
+    image = np.full((160, 240), 255, np.uint8)
+    cv2.circle(image, (60, 70), 35, 0, 3)
+    cv2.rectangle(image, (110, 30), (200, 120), 0, 2)
+    cv2.line(image, (10, 150), (230, 10), 0, 2)
+    cv2.polylines(image, [np.array([[20, 20], [50, 40], [30, 90], [90, 140]], np.int32)], False, 0, 1)
+    return cv2.Canny(cv2.GaussianBlur(image, (5, 5), 1.0), 50, 100)
+
+
+# How far the backends may disagree: they break lines at junctions differently,
+# but should trace about the same ink into about as many segments
+SEGMENT_COUNT_TOLERANCE = 0.5
+POINT_COUNT_TOLERANCE = 0.05
+
+
+def _extract(line_image: np.ndarray, backend: str) -> StrokePlan:
+    config = Config()
+    config.path_planning.contour_backend = backend
+    return PathPlanningService(config, None)._extract_contours(line_image)
+
+
+@pytest.mark.parametrize("backend", ["labelled", "dfs"])
+def test_backends_return_stroke_plans(line_image, backend):
+    plan = _extract(line_image, backend)
+    assert isinstance(plan, StrokePlan)
+    assert len(plan) > 0
+    assert plan.offsets[-1] == len(plan.points)
+
+
+def test_labelled_segments_are_8_adjacent(line_image):
+    plan = _extract(line_image, "labelled")
+    for stroke in plan:
+        assert len(stroke) >= 2
+        steps = np.abs(np.diff(stroke.astype(np.int64), axis=0))
+        assert steps.max() <= 1
+
+
+def test_labelled_covers_dfs_pixels(line_image):
+    labelled = {tuple(p) for p in _extract(line_image, "labelled").points.tolist()}
+    dfs = {tuple(p) for p in _extract(line_image, "dfs").points.tolist()}
+    assert dfs <= labelled
+
+
+def test_labelled_points_are_ink(line_image):
+    plan = _extract(line_image, "labelled")
+    xs, ys = plan.points[:, 0], plan.points[:, 1]
+    assert np.all(line_image[ys, xs] != 0)
+
+
+def test_backends_agree_on_counts(line_image):
+    labelled = _extract(line_image, "labelled")
+    dfs = _extract(line_image, "dfs")
+    assert abs(len(labelled) - len(dfs)) <= SEGMENT_COUNT_TOLERANCE * len(dfs)
+    assert abs(labelled.num_points - dfs.num_points) <= POINT_COUNT_TOLERANCE * dfs.num_points
@@ -0,0 +1,97 @@
+"""
+Drawing an image through DrawingTools on the simulated arm.
+"""
+
+from concurrent.futures import Future
+
+import numpy as np
+import cv2
+import pytest
+
+from config.config import Config
+from core.models import AttachmentType
+from services.image_processing_service import ImageProcessingService
+from services.path_planning_service import PathPlanningService
+from services.movement_service import MovementService
+from services.robot_service import RobotService
+from tools.drawing_tool import DrawingTools
+
+
+class FakeImageGenerationService:
+    """Returns a fixed image instead of calling the image API."""
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+
+    def generate_image(self, prompt: str) -> np.ndarray:
+        return self.image
+
+    def edit_image(self, image: np.ndarray, prompt: str) -> np.ndarray:
+        return self.image
+
+
+@pytest.fixture
+def drawing_tools(tmp_path, monkeypatch) -> DrawingTools:
+    config = Config()
+    config.robot.backend = "sim"
+    config.path_planning.plan_cache_dir = str(tmp_path / "plans")
+    # Tool changes ask for confirmation on the terminal
+    monkeypatch.setattr("builtins.input", lambda prompt="": "")
+
+    image_processing_service = ImageProcessingService(config)
+    path_planning_service = PathPlanningService(config, image_processing_service)
+    robot_service = RobotService(config)
+    movement_service = MovementService(config, robot_service)
+    return DrawingTools(None, image_processing_service, path_planning_service,
+                        movement_service, robot_service, None)
+
+
+@pytest.fixture
+def image() -> np.ndarray:
+    image = np.full((240, 360, 3), 255, np.uint8)
+    cv2.circle(image, (120, 120), 60, (0, 0, 0), 4)
+    cv2.rectangle(image, (200, 60), (320, 180), (0, 0, 0), 3)
+    return image
+
+
+def test_streamed_draw_caches_plan(drawing_tools, image, capsys):
+    drawing_tools.draw_image(image)
+    first = capsys.readouterr().out
+    assert "Using cached stroke plan" not in first
+    assert drawing_tools.path_planning_service.plan_cache.stats()["entries"] == 1
+
+    drawing_tools.draw_image(image)
+    assert "Using cached stroke plan" in capsys.readouterr().out
+
+
+def test_refused_plan_issues_no_motion(drawing_tools, image):
+    movement = drawing_tools.config.movement
+    movement.preflight = True
+    movement.time_budget_s = 1.0
+    movement.over_budget_policy = "refuse"
+    drawing_tools.image_generation_service = FakeImageGenerationService(image)
+    # Drawing needs the marker, so preparing the arm early would change tools
+    drawing_tools.robot_service.change_attachment(AttachmentType.ERASER)
+    arm = drawing_tools.robot_service.arm
+    arm.reset_stats()
+
+    with pytest.raises(ValueError, match="budget"):
+        drawing_tools.generate_and_draw("a circle and a square")
+    assert arm.command_count == 0
+    assert drawing_tools.robot_service.get_attachment() == AttachmentType.ERASER
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_failed_erase_is_not_drawn_over(drawing_tools, image, monkeypatch, capsys, pipelined):
+    drawing_tools.config.pipeline.enabled = pipelined
+    drawing_tools.image_generation_service = FakeImageGenerationService(image)
+    monkeypatch.setattr(drawing_tools, "capture_canvas", lambda: image)
+    failed = Future()
+    failed.set_result(-1)
+    monkeypatch.setattr(drawing_tools, "erase_canvas", lambda *args, **kwargs: failed)
+    drawn = []
+    monkeypatch.setattr(drawing_tools, "draw_image", lambda *args, **kwargs: drawn.append(args))
+
+    drawing_tools.edit_and_draw("add a triangle")
+    assert drawn == []
+    assert "Erasing failed" in capsys.readouterr().out
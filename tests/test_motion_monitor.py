@@ -0,0 +1,41 @@
+"""
+Stroke futures from RobotService.submit_polyline around controller errors.
+"""
+
+import pytest
+
+from config.config import Config
+from services.robot_service import RobotService
+
+
+@pytest.fixture
+def robot_service() -> RobotService:
+    config = Config()
+    config.robot.backend = "sim"
+    config.robot.sim_realtime = True
+    config.robot.sim_realtime_speedup = 20.0
+    return RobotService(config)
+
+
+def _submit_stroke(robot_service: RobotService):
+    x, y = robot_service.config.canvas.center
+    return robot_service.submit_polyline([(x - 60, y), (x + 60, y), (x + 60, y + 60), (x - 60, y + 60)])
+
+
+def test_recovered_error_does_not_fail_stroke(robot_service):
+    stroke = _submit_stroke(robot_service)
+    assert not stroke.done()
+    # A command reply error while the stroke is drawn is retried automatically
+    robot_service.arm.error_code = 27
+
+    assert stroke.result(timeout=30) == 0
+    assert robot_service.arm.error_code == 0
+
+
+def test_unrecovered_error_fails_stroke(robot_service):
+    stroke = _submit_stroke(robot_service)
+    assert not stroke.done()
+    # Hitting the safety boundary needs manual intervention
+    robot_service.arm.error_code = 35
+
+    assert stroke.result(timeout=30) == -1
@@ -0,0 +1,43 @@
+"""
+Pen speeds of plans sent through MovementService on the simulated arm.
+"""
+
+import numpy as np
+import pytest
+
+from config.config import Config
+from core.models import AttachmentType, SpeedType, StrokePlan
+from services.movement_service import MovementService
+from services.robot_service import RobotService
+
+
+@pytest.fixture
+def services():
+    config = Config()
+    config.robot.backend = "sim"
+    robot_service = RobotService(config)
+    return config, robot_service, MovementService(config, robot_service)
+
+
+def test_pen_moves_vertically_at_pen_speed(services):
+    config, robot_service, movement_service = services
+    moves = []
+    set_position = robot_service.arm.set_position
+
+    def record(**kwargs):
+        moves.append(kwargs)
+        return set_position(**kwargs)
+    robot_service.arm.set_position = record
+
+    centre_x, centre_y = config.canvas.center
+    plan = StrokePlan.from_segments([[(centre_x, centre_y), (centre_x + 40, centre_y), (centre_x + 40, centre_y + 40)],
+                                     [(centre_x - 40, centre_y), (centre_x - 40, centre_y + 60)]], dtype=np.float64)
+    movement_service.follow_plan(plan, AttachmentType.MARKER)
+
+    pen_speed = config.robot.get_speed(config.movement.pen_speed)
+    fast = config.robot.get_speed(SpeedType.FAST)
+    assert pen_speed < fast
+    vertical = [(a, b) for a, b in zip(moves, moves[1:]) if (a["x"], a["y"]) == (b["x"], b["y"]) and a["z"] != b["z"]]
+    # Every stroke is lowered onto and lifted off the canvas
+    assert len(vertical) == 2 * len(plan)
+    assert all(b["speed"] == pen_speed for _, b in vertical)
@@ -6,11 +6,17 @@ from services.movement_service import MovementService
 from services.robot_service import RobotService
 from services.camera_service import CameraService
 
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
 import numpy as np
 from numpy.typing import NDArray
 import cv2
 
-from core.models import RobotState, SpeedType, AttachmentType
+from core.models import RobotState, SpeedType, AttachmentType, StrokePlan
+from utils.profiling_utils import timed
 
 class DrawingTools:
     def __init__(self, 
@@ -26,75 +32,235 @@ class DrawingTools:
         self.movement_service = movement_service
         self.robot_service = robot_service
         self.camera_service = camera_service
+        self.config = movement_service.config
         
         
-    def generate_and_draw(self, prompt: str):
+    @timed()
+    def generate_and_draw(self, prompt: str, line_art: Optional[str] = None):
         """
         Generate an image from a prompt and convert it to a vector collection for drawing.
         """
         
-        generated_image = self.image_generation_service.generate_image(prompt)
+        generated_image = self._run_while_preparing_arm(AttachmentType.MARKER,
+                                                        self.image_generation_service.generate_image, prompt)
         
-        self.draw_image(generated_image)
+        self.draw_image(generated_image, line_art=line_art)
         
         
         
-    def edit_and_draw(self, prompt: str):
+    @timed()
+    def edit_and_draw(self, prompt: str, line_art: Optional[str] = None):
         """
         Edit an existing image based on a prompt.
         """
         
         cropped_canvas_image = self.capture_canvas()
         
-        generated_edit_image = self.image_generation_service.edit_image(cropped_canvas_image, prompt)
+        # Swap to the eraser before the edit request and centre the arm while it
+        # is in flight; the canvas is only erased once the edited image has arrived
+        generated_edit_image = self._run_while_preparing_arm(AttachmentType.ERASER,
+                                                             self.image_generation_service.edit_image,
+                                                             cropped_canvas_image, prompt)
+                
+        if self.config.pipeline.enabled:
+            # Plan the edited image while the eraser works through its queued moves
+            erased = self.erase_canvas(cropped_canvas_image, dock=False)
+            planned = self.path_planning_service.plan_image(generated_edit_image, line_art)
+            if erased.result() != 0:
+                print("❌ Erasing failed; not drawing over the canvas.")
+                return
+            print("Erasing completed successfully.")
+            self.draw_image(generated_edit_image, planned)
+            return
                 
         # Erase Image
-        self.erase_canvas(cropped_canvas_image)
+        if self.erase_canvas(cropped_canvas_image).result() != 0:
+            print("❌ Erasing failed; not drawing over the canvas.")
+            return
 
         # Draw Image
-        self.draw_image(generated_edit_image)
+        self.draw_image(generated_edit_image, line_art=line_art)
         
         
         
-    def draw_image(self, image: NDArray[np.uint8]):
-        line_image = self.image_processing_service.convert_to_line_image(image)
+    def _run_while_preparing_arm(self, attachment: AttachmentType, request: Callable, *args):
+        """
+        Change to `attachment`, then run an image request in the background
+        while the arm moves to the centre, returning the request's result.
+        
+        The tool change waits for the operator at a prompt, so it is done before
+        the request starts; the request's spinner would otherwise overwrite it.
+        When an over-budget plan would be refused, the arm is left alone until
+        the plan has passed its pre-flight check.
+        """
+        if (not (self.config.pipeline.enabled and self.config.pipeline.prepare_arm_during_generation)
+                or self._may_refuse_plan()):
+            return request(*args)
         
-        vector_collection = self.path_planning_service.convert_image_to_vectors(line_image)
+        if self.robot_service.get_attachment() != attachment:
+            self._change_attachment(attachment)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(request, *args)
+            self.robot_service.move_centred_position()
+            return future.result()
+        
+        
+    def _may_refuse_plan(self) -> bool:
+        """
+        Whether pre-flight may refuse a plan as over budget, in which case the
+        arm must not move before the whole plan has been checked.
+        """
+        movement = self.config.movement
+        return (movement.preflight and movement.time_budget_s is not None and
+                movement.over_budget_policy == "refuse")
+        
+        
+    def _can_stream(self) -> bool:
+        """
+        Whether drawing may start before the whole image is planned.
+        
+        Refusing over-budget plans needs the estimate of the full plan before
+        the arm moves, so that policy always plans everything first.
+        """
+        return self.config.pipeline.enabled and not self._may_refuse_plan()
+        
+        
+    @timed()
+    def draw_image(self, image: NDArray[np.uint8], planned: Optional[tuple] = None, line_art: Optional[str] = None):
+        """
+        Draw an image, or an already planned (plan, line_image) of it, with the
+        named line-art algorithm (ImageProcessingConfig.line_art by default).
+        """
+        if planned is not None:
+            vector_collection, line_image = planned
+        elif self._can_stream():
+            cached = self.path_planning_service.get_cached_plan(image, line_art)
+            if cached is None:
+                self._draw_streamed(image, line_art)
+                return
+            vector_collection, line_image = cached
+        else:
+            vector_collection, line_image = self.path_planning_service.plan_image(image, line_art)
+        
+        # Check the plan before the arm moves, including for a tool change
+        robot_plan = self.movement_service.prepare_vectors(vector_collection, line_image,
+                                                           attachment=AttachmentType.MARKER)
+        if self.config.movement.preflight:
+            self.movement_service.preflight(robot_plan, AttachmentType.MARKER)
         
         if self.robot_service.get_attachment() != AttachmentType.MARKER:
             self._change_attachment(AttachmentType.MARKER)
             
-        self.movement_service.follow_vectors(vector_collection, line_image)
+        self.movement_service.follow_plan(robot_plan)
         
         self.robot_service.move_docked_position()
         
         print("Drawing completed successfully.")
         
         
-    def erase_canvas(self, image: NDArray[np.uint8]):
+    @timed()
+    def _draw_streamed(self, image: NDArray[np.uint8], line_art: Optional[str] = None):
+        """
+        Draw an image while it is still being planned.
+        
+        A planner thread traces and orders the line image chunk by chunk into a
+        bounded queue, and the arm follows each chunk as soon as it is ready, so
+        planning time is hidden behind motion. Once every chunk has been planned
+        the whole plan is cached, so drawing the image again skips planning.
+        """
+        line_image = self.image_processing_service.convert_to_line_image(image, line_art)
+        
+        if self.robot_service.get_attachment() != AttachmentType.MARKER:
+            self._change_attachment(AttachmentType.MARKER)
+        
+        chunks = queue.Queue(maxsize=max(1, self.config.pipeline.queue_size))
+        stop = threading.Event()
+        
+        def put(item) -> bool:
+            # Give up once the drawing side has stopped, so the planner never blocks forever
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def plan():
+            try:
+                for chunk in self.path_planning_service.iter_strokes(line_image):
+                    if not put(chunk):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+        
+        def planned():
+            streamed = []
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    self.path_planning_service.cache_plan(image, StrokePlan.concatenate(streamed),
+                                                          line_image, line_art)
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                streamed.append(chunk)
+                yield chunk
+        
+        planner = threading.Thread(target=plan, name="stroke-planner", daemon=True)
+        planner.start()
+        try:
+            self.movement_service.follow_stroke_stream(planned(), line_image, attachment=AttachmentType.MARKER)
+        finally:
+            stop.set()
+            planner.join()
+        
+        self.robot_service.move_docked_position()
+        
+        print("Drawing completed successfully.")
+        
+        
+    @timed()
+    def erase_canvas(self, image: NDArray[np.uint8], dock: bool = True) -> Future:
         """
         Erase the entire canvas.
+        
+        With `dock` False the arm is left at the end of the erase path and this
+        returns as soon as the moves are queued; the returned future resolves
+        once the eraser has finished.
         """
+        erase_vectors = self.path_planning_service.plan_erase_path(image)
+        robot_plan = self.movement_service.prepare_vectors(erase_vectors, image,
+                                                           attachment=AttachmentType.ERASER)
+        if self.config.movement.preflight:
+            self.movement_service.preflight(robot_plan, AttachmentType.ERASER)
             
         if (self.robot_service.get_attachment() != AttachmentType.ERASER):
             self._change_attachment(AttachmentType.ERASER)
         
         # Erase Image
-        erase_vectors = self.path_planning_service.plan_erase_path(image)
-        self.movement_service.follow_vectors(erase_vectors, image)
+        erased = self.movement_service.follow_plan(robot_plan)
+        if not dock:
+            return erased
         
         self.robot_service.move_docked_position()
 
         print("Erasing completed successfully.")
+        return erased
         
         
         
+    @timed()
     def capture_canvas(self) -> NDArray[np.uint8]:
         """
         Capture an image of the canvas using the camera service.
         """
         if self.robot_service.get_robot_state() != RobotState.DOCKED:
             self.robot_service.move_docked_position(SpeedType.SLOW)
+        # The arm must be out of the picture before the photo is taken
+        self.robot_service.wait_for_motion()
         
         canvas_image = self.camera_service.capture_photo(save=False)
         cropped_canvas_image = self.image_processing_service.crop_to_AprilTags(canvas_image)
@@ -103,12 +269,15 @@ class DrawingTools:
         
         
         
+    @timed()
     def _change_attachment(self, attachment: AttachmentType):
         """
         Change the robot's attachment.
         """
             
         self.robot_service.move_change_tool_position()
+        # Only ask for the swap once the arm has stopped there
+        self.robot_service.wait_for_motion()
         
         _ = input(f"Change to {attachment.name} and press Enter to continue...")
         self.robot_service.change_attachment(attachment)